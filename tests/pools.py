@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""Helpers for building multi-character pools out of the Test1.bin sample"""
+
+import os
+import struct
+
+TEST_DIR = os.path.abspath(os.path.dirname(__file__))
+
+def sample(name):
+    with open(os.path.join(TEST_DIR, name), 'rb') as f:
+        return f.read()
+
+def pack_str(value):
+    data = value.encode('latin_1') + b'\x00'
+    return struct.pack('<i', len(data)) + data
+
+def str_property(name, value):
+    data = pack_str(value)
+    return (pack_str(name) + bytes(4) + pack_str('StrProperty') + bytes(4)
+            + struct.pack('<i', len(data)) + bytes(4) + data)
+
+# Test1.bin is the 165 byte header for a 1 character pool followed by a single
+# record starting with a 59 byte strFirstName property
+HEADER_SIZE = 165
+FIRST_NAME_SIZE = 59
+
+def make_record(first_name):
+    """returns the bytes of Test1.bin's character with firstName changed"""
+    data = sample('Test1.bin')
+    return str_property('strFirstName', first_name) + data[HEADER_SIZE + FIRST_NAME_SIZE:]
+
+def make_header(count):
+    header = bytearray(sample('Test1.bin')[:HEADER_SIZE])
+    struct.pack_into('<i', header, 56, count)
+    struct.pack_into('<i', header, HEADER_SIZE - 4, count)
+    return bytes(header)
+
+def make_pool(first_names):
+    """returns the bytes of a pool holding a copy of Test1.bin's character
+    for each name in first_names"""
+    return make_header(len(first_names)) + b''.join(map(make_record, first_names))
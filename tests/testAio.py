@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+
+import asyncio
+import unittest as ut
+from pools import make_pool, sample, HEADER_SIZE
+from xcfp import AsyncParser, CharacterPool
+from xcfp.parser import XCFParseError
+
+NAMES = ['Char{}'.format(i) for i in range(6)]
+
+async def trickle(data, size):
+    """an async source handing out 'data' a few bytes at a time"""
+    for i in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[i:i + size]
+
+async def collect(pool, **kwargs):
+    return [char async for char in pool.acharacters(**kwargs)]
+
+class TestAsync(ut.TestCase):
+    """Tests reading pools from async byte sources"""
+
+    def setUp(self):
+        self.data = make_pool(NAMES)
+        self.expected = [char.to_dict() for char in CharacterPool(self.data)]
+
+    def test_iterable_source(self):
+        for size in (1, 7, 1000, len(self.data)):
+            chars = asyncio.run(collect(CharacterPool(trickle(self.data, size))))
+            self.assertEqual([char.to_dict() for char in chars], self.expected, size)
+
+    def test_stream_reader(self):
+        async def read():
+            reader = asyncio.StreamReader()
+
+            async def feed():
+                for i in range(0, len(self.data), 500):
+                    reader.feed_data(self.data[i:i + 500])
+                    await asyncio.sleep(0)
+                reader.feed_eof()
+
+            task = asyncio.ensure_future(feed())
+            chars = await collect(CharacterPool(reader), chunk_size=256)
+            await task
+            return chars
+
+        chars = asyncio.run(read())
+        self.assertEqual([char.to_dict() for char in chars], self.expected)
+
+    def test_fields(self):
+        chars = asyncio.run(collect(CharacterPool(trickle(self.data, 100)), fields=['firstName']))
+        self.assertEqual([char.firstName for char in chars], NAMES)
+
+    def test_records(self):
+        async def read():
+            return [record async for record in AsyncParser(trickle(sample('Test1.bin'), 64)).records()]
+
+        self.assertEqual(asyncio.run(read()), [sample('Test1.bin')[HEADER_SIZE:]])
+
+    def test_empty(self):
+        self.assertEqual(asyncio.run(collect(CharacterPool(trickle(sample('Empty.bin'), 3)))), [])
+
+    def test_truncated(self):
+        with self.assertRaises(IOError):
+            asyncio.run(collect(CharacterPool(trickle(self.data[:-10], 100))))
+
+    def test_bad_magic(self):
+        with self.assertRaises(XCFParseError):
+            asyncio.run(collect(CharacterPool(trickle(b'\x00' * 100, 10))))
+
+if __name__ == "__main__":
+    ut.main()
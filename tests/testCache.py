@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+
+import unittest as ut
+import os
+import tempfile
+from pools import make_pool
+from xcfp import CharacterPool, IndexCache
+
+NAMES = ['Char{}'.format(i) for i in range(5)]
+
+class TestIndexCache(ut.TestCase):
+    """Tests CharacterPool index caching with IndexCache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmp.name, 'pool.bin')
+        self.write_pool(NAMES)
+        self.cache = IndexCache(os.path.join(self.tmp.name, 'cache'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_pool(self, names):
+        with open(self.fname, 'wb') as f:
+            f.write(make_pool(names))
+
+    def test_round_trip(self):
+        pool = CharacterPool(self.fname, cache=self.cache)
+        offsets = pool.offsets()
+        summaries = pool.summaries()
+
+        self.assertEqual(self.cache.load(self.fname), (offsets, summaries))
+        self.assertEqual([s['firstName'] for s in summaries], NAMES)
+
+    def test_cached_pool_skips_parsing(self):
+        CharacterPool(self.fname, cache=self.cache).offsets()
+
+        pool = CharacterPool(self.fname, cache=self.cache)
+        pool._build_index = None
+        self.assertEqual(len(pool), len(NAMES))
+        self.assertEqual(pool.filter(firstName='Char3'), [3])
+        self.assertEqual(pool.filter(country='Country_UK'), list(range(len(NAMES))))
+
+    def test_invalidated_on_change(self):
+        CharacterPool(self.fname, cache=self.cache).offsets()
+        self.write_pool(NAMES[:2])
+        os.utime(self.fname, ns=(0, 0))
+
+        self.assertIsNone(self.cache.load(self.fname))
+        self.assertEqual(len(CharacterPool(self.fname, cache=self.cache)), 2)
+
+    def test_sidecar(self):
+        cache = IndexCache()
+        CharacterPool(self.fname, cache=cache).offsets()
+        self.assertTrue(os.path.exists(self.fname + IndexCache.SUFFIX))
+
+    def test_eviction(self):
+        cache = IndexCache(self.cache.cache_dir, max_entries=2)
+        for i in range(4):
+            fname = os.path.join(self.tmp.name, '{}.bin'.format(i))
+            with open(fname, 'wb') as f:
+                f.write(make_pool(NAMES[:i]))
+            CharacterPool(fname, cache=cache).offsets()
+            os.utime(cache.entry_path(fname), ns=(i, i))
+
+        self.assertEqual(len(os.listdir(cache.cache_dir)), 2)
+        self.assertIsNotNone(cache.load(os.path.join(self.tmp.name, '3.bin')))
+
+    def test_eviction_batched(self):
+        cache = IndexCache(self.cache.cache_dir, max_entries=10)
+        scans = []
+        evict = cache.evict
+        cache.evict = lambda: scans.append(1) or evict()
+        for i in range(25):
+            fname = os.path.join(self.tmp.name, '{}.bin'.format(i))
+            with open(fname, 'wb') as f:
+                f.write(make_pool(NAMES[:i % 5]))
+            CharacterPool(fname, cache=cache).offsets()
+            os.utime(cache.entry_path(fname), ns=(i, i))
+            self.assertLessEqual(len(os.listdir(cache.cache_dir)), 10)
+
+        #the directory is scanned on the first store and then only when full,
+        #each time clearing room for the next few
+        self.assertEqual(len(scans), 9)
+        self.assertIsNotNone(cache.load(os.path.join(self.tmp.name, '24.bin')))
@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest as ut
+from pools import make_pool, sample
+from xcfp import CharacterPool
+from xcfp import cli
+from xcfp.cli import main, expand_paths
+
+NAMES = ['Char{}'.format(i) for i in range(3)]
+
+class TestCli(ut.TestCase):
+    """Tests the xcfp.py command line tool"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.dir, 'sub'))
+        self.pool = os.path.join(self.dir, 'Pool.bin')
+        self.test1 = os.path.join(self.dir, 'sub', 'Test1.bin')
+        with open(self.pool, 'wb') as f:
+            f.write(make_pool(NAMES))
+        with open(self.test1, 'wb') as f:
+            f.write(sample('Test1.bin'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def run_main(self, *argv):
+        out = io.BytesIO()
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            status = main(list(argv), out)
+        return status, out.getvalue().decode('utf-8'), err.getvalue()
+
+    def test_details(self):
+        status, out, err = self.run_main(self.test1)
+        self.assertEqual(status, 0)
+        char = CharacterPool(sample('Test1.bin'))[0]
+        self.assertEqual(out, char.details() + '\n')
+        self.assertTrue(out.startswith('firstName: Testy\n'))
+
+    def test_jsonl(self):
+        status, out, _ = self.run_main('-f', 'jsonl', self.pool, self.test1)
+        self.assertEqual(status, 0)
+        rows = [json.loads(line) for line in out.splitlines()]
+        expected = [char.to_dict() for char in CharacterPool(self.pool)]
+        expected += [char.to_dict() for char in CharacterPool(self.test1)]
+        self.assertEqual(rows, json.loads(json.dumps(expected)))
+
+    def test_fields(self):
+        status, out, _ = self.run_main('-f', 'jsonl', '--fields', 'firstName,appearance.gender', self.pool)
+        self.assertEqual(status, 0)
+        rows = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([row['firstName'] for row in rows], NAMES)
+        self.assertEqual(list(rows[0]), ['firstName', 'appearance.gender'])
+
+    def test_csv(self):
+        status, out, _ = self.run_main('-f', 'csv', '--fields', 'firstName,lastName', self.dir)
+        self.assertEqual(status, 0)
+        rows = list(csv.reader(io.StringIO(out)))
+        self.assertEqual(rows[0], ['firstName', 'lastName'])
+        self.assertEqual([row[0] for row in rows[1:]], NAMES + ['Testy'])
+
+    def test_workers(self):
+        _, serial, _ = self.run_main('-f', 'jsonl', self.pool, self.test1, self.pool)
+        status, parallel, _ = self.run_main('-f', 'jsonl', '-j', '2', self.pool, self.test1, self.pool)
+        self.assertEqual(status, 0)
+        self.assertEqual(parallel, serial)
+
+    def test_errors(self):
+        bad = os.path.join(self.dir, 'Bad.bin')
+        with open(bad, 'wb') as f:
+            f.write(b'junk')
+
+        status, out, err = self.run_main('-f', 'jsonl', '--fields', 'firstName', bad,
+                                         self.test1, os.path.join(self.dir, 'missing.bin'))
+        self.assertEqual(status, 1)
+        self.assertEqual(out, '{"firstName": "Testy"}\n')
+        self.assertIn(bad, err)
+        self.assertIn('missing.bin', err)
+        self.assertIn('2 of 3 files failed', err)
+
+    def test_batches(self):
+        #a file that breaks partway still has the characters before that
+        #written out, a batch at a time
+        truncated = os.path.join(self.dir, 'Truncated.bin')
+        with open(truncated, 'wb') as f:
+            f.write(make_pool(NAMES)[:-7])
+
+        batch_size = cli.BATCH_SIZE
+        cli.BATCH_SIZE = 1
+        try:
+            status, out, err = self.run_main('-f', 'jsonl', '--fields', 'firstName',
+                                             truncated, self.test1)
+        finally:
+            cli.BATCH_SIZE = batch_size
+        self.assertEqual(status, 1)
+        self.assertEqual([json.loads(line)['firstName'] for line in out.splitlines()],
+                         NAMES[:2] + ['Testy'])
+        self.assertIn('Truncated.bin', err)
+
+    def test_unknown_field(self):
+        with self.assertRaises(SystemExit):
+            self.run_main('--fields', 'nonsense', self.pool)
+        #a whole struct isn't a value that can be printed
+        for fmt in ('jsonl', 'csv'):
+            with self.assertRaises(SystemExit):
+                self.run_main('-f', fmt, '--fields', 'firstName,appearance', self.pool)
+
+    def test_stats(self):
+        status, _, err = self.run_main('--stats', self.pool)
+        self.assertEqual(status, 0)
+        self.assertIn('characters: 3', err)
+
+    def test_validate(self):
+        with open(os.path.join(self.dir, 'Bad.bin'), 'wb') as f:
+            f.write(sample('Test1.bin')[:-7])
+
+        status, out, err = self.run_main('--validate', self.dir)
+        self.assertEqual(status, 1)
+        self.assertIn('Test1.bin: OK, 1 characters', out)
+        self.assertIn('Bad.bin:', out)
+        self.assertIn('1 of 3 files failed', err)
+
+        status, out, _ = self.run_main('--validate', '--strict', '-f', 'jsonl', self.pool)
+        self.assertEqual(status, 0)
+        self.assertTrue(json.loads(out)['valid'])
+
+    def test_expand_paths(self):
+        self.assertEqual(list(expand_paths([self.dir])), [self.pool, self.test1])
+        self.assertEqual(list(expand_paths([os.path.join(self.dir, '**', 'T*.bin')])), [self.test1])
+        self.assertEqual(list(expand_paths(['-', 'nothing*.bin'])), ['-', 'nothing*.bin'])
+
+if __name__ == "__main__":
+    ut.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+
+import unittest as ut
+from pools import make_pool
+from xcfp import CharacterPool
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NAMES = ['Char{}'.format(i % 3) for i in range(7)]
+
+@ut.skipIf(np is None, "NumPy not installed")
+class TestToColumns(ut.TestCase):
+    """Tests exporting a pool as NumPy columns"""
+
+    def setUp(self):
+        self.pool = CharacterPool(make_pool(NAMES))
+
+    def test_matches_table(self):
+        columns = self.pool.to_columns()
+        table = self.pool.to_table()
+
+        for path, column in columns.items():
+            with self.subTest(path=path):
+                if isinstance(column, np.ndarray):
+                    self.assertEqual(column.tolist(), list(table.column(path)))
+                else:
+                    values = [column.categories[code] for code in column.codes]
+                    self.assertEqual(values, table.column(path))
+
+    def test_dtypes(self):
+        columns = self.pool.to_columns(['appearance.gender', 'allowedTypeVIP', 'firstName'])
+        self.assertEqual(list(columns), ['appearance.gender', 'allowedTypeVIP', 'firstName'])
+        self.assertEqual(columns['appearance.gender'].dtype, np.int32)
+        self.assertEqual(columns['allowedTypeVIP'].dtype, np.bool_)
+
+        names = columns['firstName']
+        self.assertEqual(names.categories, ['Char0', 'Char1', 'Char2'])
+        self.assertEqual(names.codes.tolist(), [i % 3 for i in range(len(NAMES))])
+
+    def test_missing_fields_default(self):
+        data = make_pool(NAMES[:1])
+        columns = CharacterPool(data).to_columns(['appearance.torsoUnderlay'])
+        self.assertEqual(columns['appearance.torsoUnderlay'].categories, ['CnvUnderlay_std_A_F'])
@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+
+import unittest as ut
+from pools import make_pool, pack_str, str_property
+from xcfp import CharacterPool, Character
+from xcfp.compiled import decoder_for
+from xcfp.parser import Parser, BufferParser
+import io
+
+END = pack_str('None') + bytes(4)
+
+class TestCompiledDecoder(ut.TestCase):
+    """Tests the schema specific decoders give the same results as the
+    generic parser"""
+
+    def test_matches_generic(self):
+        data = make_pool(['Char{}'.format(i) for i in range(3)])
+        generic = [c.to_dict() for c in CharacterPool(data).characters()]
+        compiled = [c.to_dict() for c in CharacterPool(data, compiled=True).characters()]
+        self.assertEqual(compiled, generic)
+
+    def test_nested_struct(self):
+        char = CharacterPool(make_pool(['Char']), compiled=True)[0]
+        struct = char.fields['kAppearance']
+        self.assertIs(struct._pending.decoder, decoder_for(type(struct)))
+        self.assertEqual(char.appearance.gender, 1)
+
+    def test_out_of_order(self):
+        data = (str_property('strLastName', 'Last') + str_property('Unknown', 'x')
+                + str_property('strFirstName', 'First') + str_property('strNickName', 'Nick') + END)
+        parser = BufferParser(data, decoder=decoder_for(Character))
+        char = Character(parser.properties())
+
+        self.assertEqual(parser.pos, len(data))
+        self.assertEqual(list(char.fields), ['strLastName', 'Unknown', 'strFirstName', 'strNickName'])
+        self.assertEqual((char.firstName, char.lastName, char.nickName), ('First', 'Last', 'Nick'))
+
+    def test_file_parser_fallback(self):
+        data = str_property('strFirstName', 'First') + END
+        char = Character(Parser(io.BytesIO(data), decoder=decoder_for(Character)).properties())
+        self.assertEqual(char.firstName, 'First')
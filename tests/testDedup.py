@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+
+import os
+import shutil
+import tempfile
+import unittest as ut
+from pools import make_pool, sample
+from xcfp import CharacterPool, PoolWriter, dedup
+
+class TestDedup(ut.TestCase):
+    """Tests finding duplicate characters across pools"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.first = self.write('First.bin', make_pool(['A', 'B', 'C']))
+        self.second = self.write('Second.bin', make_pool(['C', 'D', 'A', 'A']))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, data):
+        fname = os.path.join(self.dir, name)
+        with open(fname, 'wb') as f:
+            f.write(data)
+        return fname
+
+    def groups(self, paths, **kwargs):
+        return sorted((sorted((ref.path, ref.index) for ref in group.refs)
+                       for group in dedup(paths, **kwargs)))
+
+    def test_groups(self):
+        expected = [[(self.first, 0), (self.second, 2), (self.second, 3)],
+                    [(self.first, 2), (self.second, 0)]]
+        self.assertEqual(self.groups([self.first, self.second]), expected)
+        #spilling sorted runs to disk gives the same answer
+        self.assertEqual(self.groups([self.first, self.second], run_size=2), expected)
+
+    def test_refs(self):
+        pool = CharacterPool(self.second)
+        group, = dedup([pool])
+        self.assertEqual([ref.index for ref in group.refs], [2, 3])
+        self.assertEqual([ref.offset for ref in group.refs],
+                         [pool.offsets()[2][0], pool.offsets()[3][0]])
+        self.assertEqual(group.hash, pool[2].content_hash())
+
+    def test_content_hash(self):
+        pool = CharacterPool(self.second)
+        self.assertEqual(pool[2].content_hash(), pool[3].content_hash())
+        self.assertNotEqual(pool[0].content_hash(), pool[2].content_hash())
+
+    def test_ignore(self):
+        char = CharacterPool(sample('Test1.bin'))[0]
+        other = CharacterPool(sample('Test1.bin'))[0]
+        other.timestamp = 'January 1, 2020 - 1:00 AM'
+        self.assertNotEqual(char.content_hash(), other.content_hash())
+        self.assertEqual(char.content_hash(['timestamp']), other.content_hash(['timestamp']))
+
+        fname = os.path.join(self.dir, 'Stamped.bin')
+        with PoolWriter(fname) as writer:
+            writer.write([char, other])
+        self.assertEqual(self.groups([fname]), [])
+        self.assertEqual(self.groups([fname], ignore=['timestamp']), [[(fname, 0), (fname, 1)]])
+
+        with self.assertRaises(KeyError):
+            char.content_hash(['nonsense'])
+
+    def test_errors(self):
+        bad = self.write('Bad.bin', b'junk')
+        errors = []
+        self.assertEqual(len(self.groups([bad, self.second], errors=errors)), 1)
+        self.assertEqual([path for path, _ in errors], [bad])
+
+        with self.assertRaises(Exception):
+            list(dedup([bad]))
+
+    def test_partial_file_left_out(self):
+        #the first two records are fine, it breaks in the third
+        truncated = self.write('Truncated.bin', make_pool(['A', 'C', 'D'])[:-7])
+        errors = []
+        self.assertEqual(self.groups([truncated, self.first], errors=errors), [])
+        self.assertEqual([path for path, _ in errors], [truncated])
+
+    def test_buffer_names(self):
+        with open(self.second, 'rb') as f:
+            pool = CharacterPool(f.read())
+        groups = list(dedup([self.first, pool]))
+        #an in-memory pool goes by its position in the paths
+        self.assertEqual({ref.path for group in groups for ref in group.refs}, {self.first, 1})
+
+if __name__ == "__main__":
+    ut.main()
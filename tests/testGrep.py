@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+
+import unittest as ut
+import re
+from pools import make_pool
+from xcfp import CharacterPool
+
+class TestGrep(ut.TestCase):
+    """Tests searching pools through their raw bytes"""
+
+    def setUp(self):
+        self.pool = CharacterPool(make_pool(['Alice', 'Bob', 'Alicia', 'CharacterPool']))
+
+    def names(self, results):
+        return [(index, char.firstName) for index, char in results]
+
+    def test_literal(self):
+        self.assertEqual(self.names(self.pool.grep('Ali')), [(0, 'Alice'), (2, 'Alicia')])
+        self.assertEqual(self.names(self.pool.grep('Bob', fields=['firstName'])), [(1, 'Bob')])
+
+    def test_regex(self):
+        self.assertEqual(self.names(self.pool.grep(re.compile('B.b'))), [(1, 'Bob')])
+        self.assertEqual(self.names(self.pool.grep(re.compile(b'ali', re.I))), [(0, 'Alice'), (2, 'Alicia')])
+
+    def test_appearance_fields(self):
+        results = list(self.pool.grep('Beaglerush'))
+        self.assertEqual(len(results), 4)
+        self.assertEqual(list(self.pool.grep('Beaglerush', fields=['firstName'])), [])
+
+    def test_verified(self):
+        # in the raw bytes of every record but not a value
+        self.assertEqual(list(self.pool.grep('kAppearance')), [])
+        # in the header as well as a record
+        self.assertEqual(self.names(self.pool.grep('CharacterPool')), [(3, 'CharacterPool')])
+
+    def test_outside_latin1(self):
+        #can't be in the file so can't match
+        self.assertEqual(list(self.pool.grep('Alť')), [])
+        #but a regex could still match something else
+        self.assertEqual(self.names(self.pool.grep(re.compile('[ťB]ob'))), [(1, 'Bob')])
+
+    def test_accented(self):
+        pool = CharacterPool(make_pool(['ÉMILE', 'Zoë', 'Emile']))
+        self.assertEqual(self.names(pool.grep(re.compile('émile', re.I))), [(0, 'ÉMILE')])
+        self.assertEqual(self.names(pool.grep(re.compile('(?i:émile)'))), [(0, 'ÉMILE')])
+        self.assertEqual(self.names(pool.grep(re.compile(r'\wMILE'))), [(0, 'ÉMILE')])
+        self.assertEqual(self.names(pool.grep(re.compile(r'Zo\w$'))), [(1, 'Zoë')])
+        self.assertEqual(self.names(pool.grep('Zoë')), [(1, 'Zoë')])
+        #bytes patterns keep to ASCII
+        self.assertEqual(self.names(pool.grep(re.compile(rb'\wMILE'))), [])
+
+    def test_no_match_not_parsed(self):
+        pool = CharacterPool(make_pool(['Alice']))
+        pool.offsets = None
+        self.assertEqual(list(pool.grep('Zebra')), [])
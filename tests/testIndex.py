@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+import unittest as ut
+import os
+import tempfile
+from pools import make_pool
+from xcfp import PoolIndex
+
+class TestPoolIndex(ut.TestCase):
+    """Tests the secondary indexes over many pools"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for names in (['Alice', 'Bob'], ['Carol', 'Alicia', 'Dave']):
+            fname = os.path.join(self.tmp.name, '{}.bin'.format(len(self.files)))
+            with open(fname, 'wb') as f:
+                f.write(make_pool(names))
+            self.files.append(fname)
+
+        self.index = PoolIndex()
+        for fname in self.files:
+            self.index.add(fname)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def names(self, handles):
+        return [handle.character().firstName for handle in handles]
+
+    def test_where(self):
+        self.assertEqual(len(self.index), 5)
+        handles = self.index.where(country='Country_UK', soldierClass='Rookie')
+        self.assertEqual(self.names(handles), ['Alice', 'Bob', 'Carol', 'Alicia', 'Dave'])
+        self.assertEqual(self.index.where(appearance__gender=1), handles)
+        self.assertEqual(self.index.where(country='Country_USA'), [])
+        with self.assertRaises(KeyError):
+            self.index.where(firstName='Alice')
+
+    def test_search(self):
+        self.assertEqual(self.names(self.index.search(name='lic')), ['Alice', 'Alicia'])
+        self.assertEqual(self.names(self.index.search(firstName='ALI', prefix=True)), ['Alice', 'Alicia'])
+        self.assertEqual(self.names(self.index.search(name='ob')), ['Bob'])
+        self.assertEqual(self.names(self.index.search(lastName='testington')), ['Alice', 'Bob', 'Carol', 'Alicia', 'Dave'])
+
+    def test_handles(self):
+        handle = self.index.search(firstName='dave')[0]
+        self.assertEqual(handle.file, self.files[1])
+        self.assertLess(handle.start, handle.end)
+
+    def test_remove_and_update(self):
+        self.index.remove(self.files[1])
+        self.assertNotIn(self.files[1], self.index)
+        self.assertEqual(self.names(self.index.search(name='lic')), ['Alice'])
+        self.assertEqual(len(self.index.where(country='Country_UK')), 2)
+
+        with open(self.files[0], 'wb') as f:
+            f.write(make_pool(['Erin']))
+        self.index.add(self.files[0])
+        self.assertEqual(self.names(self.index.where()), ['Erin'])
+        self.assertEqual(self.index.search(name='alice'), [])
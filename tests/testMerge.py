@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+
+import io
+import os
+import shutil
+import tempfile
+import unittest as ut
+from pools import make_pool, sample
+from xcfp import CharacterPool, merge
+
+class TestMerge(ut.TestCase):
+    """Tests merging and splitting pools without re-encoding records"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.first = CharacterPool(make_pool(['A0', 'A1', 'A2']))
+        self.second = CharacterPool(make_pool(['B0', 'B1']))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def names(self, fname):
+        return [char.firstName for char in CharacterPool(fname)]
+
+    def test_merge(self):
+        count = merge([self.first, self.second], self.path('All.bin'))
+        self.assertEqual(count, 5)
+        self.assertEqual(self.names(self.path('All.bin')), ['A0', 'A1', 'A2', 'B0', 'B1'])
+
+    def test_records_copied(self):
+        merge([sample('Test1.bin')], self.path('Test1.bin'))
+        with open(self.path('Test1.bin'), 'rb') as f:
+            self.assertEqual(f.read(), sample('Test1.bin'))
+
+    def test_select(self):
+        count = merge([self.first, self.second], self.path('Some.bin'),
+                      select=lambda char: char.firstName.endswith('1'), fields=['firstName'])
+        self.assertEqual(count, 2)
+        self.assertEqual(self.names(self.path('Some.bin')), ['A1', 'B1'])
+
+    def test_select_none(self):
+        merge([self.first], self.path('Empty.bin'), select=lambda char: False)
+        with open(self.path('Empty.bin'), 'rb') as f:
+            self.assertEqual(f.read(), sample('Empty.bin'))
+
+    def test_merge_to_stream(self):
+        class Stream(io.BytesIO):
+            def seekable(self):
+                return False
+
+        out = Stream()
+        merge([self.second, self.first], out, select=lambda char: char.firstName != 'A0')
+        self.assertEqual(self.names(out.getvalue()), ['B0', 'B1', 'A1', 'A2'])
+
+    def test_split(self):
+        fnames = self.first.split(lambda char: char.firstName[1] == '1', self.path('{}.bin'),
+                                  fields=['firstName'])
+        self.assertEqual(fnames, {False: self.path('False.bin'), True: self.path('True.bin')})
+        self.assertEqual(self.names(fnames[False]), ['A0', 'A2'])
+        self.assertEqual(self.names(fnames[True]), ['A1'])
+
+    def test_split_by_field(self):
+        fnames = self.first.split('soldierClass', self.path('{}.bin'))
+        self.assertEqual(list(fnames), ['Rookie'])
+        self.assertEqual(self.names(fnames['Rookie']), ['A0', 'A1', 'A2'])
+
+if __name__ == "__main__":
+    ut.main()
@@ -3,7 +3,7 @@
 import unittest as ut
 import os
 import io
-from xcfp.parser import Parser, XCFParseError
+from xcfp.parser import Parser, BufferParser, StreamParser, XCFParseError
 
 class TestParserRead(ut.TestCase):
     """Tests the Parser.read() method"""
@@ -80,7 +80,6 @@ class TestParserReadStr(ut.TestCase):
 
 from unittest import mock
 
-@mock.patch.multiple('xcfp.parser', PropertyType=mock.DEFAULT, Property=mock.DEFAULT)
 class TestPraserReadProperty(ut.TestCase):
     """Tests the Parser.read_property() method"""
 
@@ -95,36 +94,33 @@ class TestPraserReadProperty(ut.TestCase):
     value_data2 = b'\x08' + bytes(3) + b'Ramirez\x00'
     data2 = name_data2 + type_data + size_data2 + value_data2
 
-    def setUpMocks(self, PropertyType, Property):
-        mockPropType = mock.MagicMock(spec=('unpack',))
-        mockPropType.typename = mock.sentinel.typename
-        mockPropType.unpack.return_value = mock.sentinel.value
-        PropertyType.return_value = mockPropType
-
-        Property.return_value = mock.sentinel.Property
-
-    def assert_calls(self, PropertyType, Property, name, typename, value):
-        PropertyType.assert_called_with(typename)
-        PropertyType.return_value.unpack.assert_called_with(value)
-        Property.assert_called_with(name, mock.sentinel.typename, mock.sentinel.value)
-
-    def test_read_property(self, PropertyType, Property):
-
-        self.setUpMocks(PropertyType, Property)
-        with Parser(io.BytesIO(self.data1)) as parser:
+    def setUp(self):
+        self.PropType = mock.MagicMock(spec=('unpack', '__call__'))
+        self.PropType.typename = mock.sentinel.typename
+        self.PropType.unpack.return_value = mock.sentinel.value
+        self.PropType.return_value = mock.sentinel.Property
+        self.types = {'StrProperty': self.PropType}
+
+    def assert_calls(self, name, value):
+        self.PropType.unpack.assert_called_with(value)
+        self.PropType.assert_called_with(name, mock.sentinel.typename, mock.sentinel.value)
+
+    def test_read_property(self):
+        with Parser(io.BytesIO(self.data1), types=self.types) as parser:
             self.assertIs(parser.read_property(), mock.sentinel.Property)
-            self.assert_calls(PropertyType, Property, 'strFirstName', 'StrProperty', self.value_data1)
+            self.assert_calls('strFirstName', self.value_data1)
 
-    def test_read_property_multiple(self, PropertyType, Property):
-
-        self.setUpMocks(PropertyType, Property)
-
-        with Parser(io.BytesIO(self.data1 + self.data2)) as parser:
+    def test_read_property_multiple(self):
+        with Parser(io.BytesIO(self.data1 + self.data2), types=self.types) as parser:
             self.assertIs(parser.read_property(), mock.sentinel.Property, "First Call")
-            self.assert_calls(PropertyType, Property, 'strFirstName', 'StrProperty', self.value_data1)
+            self.assert_calls('strFirstName', self.value_data1)
 
             self.assertIs(parser.read_property(), mock.sentinel.Property, "Second Call")
-            self.assert_calls(PropertyType, Property, 'strLastName', 'StrProperty', self.value_data2)
+            self.assert_calls('strLastName', self.value_data2)
+
+    def test_unknown_type(self):
+        with Parser(io.BytesIO(self.data1), types={}) as parser, self.assertRaises(TypeError):
+            parser.read_property()
 
 class TestParserReadEmpty(ut.TestCase):
     """Tests the Parser reading an empty character pool (Empty.bin)"""
@@ -153,3 +149,163 @@ class TestParserReadFile(ut.TestCase):
 
     def test_read_header(self):
         self.assertEqual(self.parser.read_header(), 1)
+
+class Unseekable(io.BytesIO):
+    """a file like a pipe, that can only be read forwards"""
+
+    def seekable(self):
+        return False
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation("not seekable")
+
+    def tell(self):
+        raise io.UnsupportedOperation("not seekable")
+
+class TestStreamParser(ut.TestCase):
+    """Tests the read ahead StreamParser"""
+
+    def test_read(self):
+        with StreamParser(Unseekable(b'\x01\x02\x03\x04\x05'), block_size=2) as parser:
+            self.assertEqual(parser.read(3), b'\x01\x02\x03')
+            self.assertEqual(parser.tell(), 3)
+            with self.assertRaises(IOError):
+                parser.read(3)
+
+    def test_read_str(self):
+        data = b'\x06\x00\x00\x00Hello\x00\x07\x00\x00\x00World!\x00\x00\x00\x00\x00'
+        with StreamParser(Unseekable(data), block_size=3) as parser:
+            self.assertEqual(parser.read_str(), 'Hello')
+            self.assertEqual(parser.read_str(), 'World!')
+            self.assertEqual(parser.read_str(), '')
+
+    def test_read_file(self):
+        fname = os.path.join(os.path.dirname(__file__), 'Test1.bin')
+        with open(fname, 'rb') as f:
+            data = f.read()
+        with Parser(fname) as parser:
+            parser.read_header()
+            expected = [(p.name, str(p)) for p in parser.properties()]
+
+        for block_size in (1, 100, 1 << 16):
+            with StreamParser(Unseekable(data), block_size=block_size) as parser:
+                self.assertEqual(parser.read_header(), 1)
+                self.assertEqual([(p.name, str(p)) for p in parser.properties()], expected)
+
+    def test_read_raw_properties(self):
+        fname = os.path.join(os.path.dirname(__file__), 'Test1.bin')
+        with open(fname, 'rb') as f:
+            data = f.read()
+        with StreamParser(Unseekable(data), block_size=7) as parser:
+            parser.read_header()
+            start = parser.tell()
+            self.assertEqual(parser.read_raw_properties(), data[start:])
+
+    def test_seek(self):
+        with StreamParser(io.BytesIO(bytes(range(100))), block_size=10) as parser:
+            parser.read(50)
+            parser.seek(5)
+            self.assertEqual(parser.read(1), b'\x05')
+            parser.seek(95)
+            self.assertEqual(parser.read(1), b'\x5f')
+
+class TestBufferParser(ut.TestCase):
+    """Tests the BufferParser primitives match the file backed Parser"""
+
+    def test_read(self):
+        parser = BufferParser(b'\x01\x02\x03\x04\x05')
+        self.assertEqual(bytes(parser.read(4)), b'\x01\x02\x03\x04')
+        self.assertEqual(bytes(parser.read(1)), b'\x05')
+        with self.assertRaises(IOError):
+            parser.read(1)
+
+    def test_read_int(self):
+        parser = BufferParser(b'\x00\x00\x00\x00\xff\xff\xff\xff\x01\x00')
+        self.assertEqual(parser.read_int(), 0, "First Read")
+        self.assertEqual(parser.read_int(), -1, "Second Read")
+        with self.assertRaises(IOError):
+            parser.read_int()
+
+    def test_read_str(self):
+        parser = BufferParser(b'\x06\x00\x00\x00Hello\x00\x00\x00\x00\x00')
+        self.assertEqual(parser.read_str(), 'Hello')
+        self.assertEqual(parser.read_str(), '')
+
+    def test_read_str_errors(self):
+        with self.assertRaises(XCFParseError):
+            BufferParser(b'\x04\x00\x00\x00Hello\x00').read_str()
+        with self.assertRaises(IOError):
+            BufferParser(b'\x07\x00\x00\x00Hello\x00').read_str()
+
+    def test_read_file(self):
+        fname = os.path.join(os.path.dirname(__file__), 'Test1.bin')
+        with Parser(fname) as parser:
+            parser.read_header()
+            expected = [(p.name, str(p)) for p in parser.properties()]
+
+        with open(fname, 'rb') as f:
+            data = f.read()
+
+        for source in (fname, data):
+            with BufferParser(source) as parser, self.subTest(source=type(source)):
+                self.assertEqual(parser.read_header(), 1)
+                props = [(p.name, str(p)) for p in parser.properties()]
+                self.assertEqual(props, expected)
+
+    def test_read_empty(self):
+        fname = os.path.join(os.path.dirname(__file__), 'Empty.bin')
+        with BufferParser(fname) as parser:
+            self.assertEqual(parser.read_header(), 0)
+
+from xcfp.parser import InternTable
+from xcfp.properties.atomic import NameProperty, StrProperty
+
+class TestInternTable(ut.TestCase):
+    """Tests sharing decoded values through an InternTable"""
+
+    name_data = b'\x05\x00\x00\x00Name\x00\x03\x00\x00\x00'
+
+    def test_shared_values(self):
+        table = InternTable()
+        first = table.unpack(NameProperty, memoryview(bytes(self.name_data)))
+        second = table.unpack(NameProperty, bytes(self.name_data))
+        self.assertEqual(first, ('Name', 3))
+        self.assertIs(first, second)
+        self.assertEqual(len(table), 1)
+
+    def test_writable_buffer(self):
+        table = InternTable()
+        value = table.unpack(NameProperty, memoryview(bytearray(self.name_data)))
+        self.assertIs(table.unpack(NameProperty, self.name_data), value)
+
+    def test_types_kept_apart(self):
+        table = InternTable()
+        data = b'\x05\x00\x00\x00Name\x00'
+        self.assertEqual(table.unpack(StrProperty, data), 'Name')
+        self.assertEqual(table.unpack(NameProperty, data + bytes(4)), ('Name', 0))
+
+    def test_long_values_not_kept(self):
+        table = InternTable(max_length=4)
+        self.assertEqual(table.unpack(NameProperty, self.name_data), ('Name', 3))
+        self.assertEqual(len(table), 0)
+
+    def test_max_entries(self):
+        table = InternTable(max_entries=2)
+        for name in (b'A', b'B', b'C'):
+            table.unpack(StrProperty, b'\x02\x00\x00\x00' + name + b'\x00')
+        #filling the table up starts it again
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.unpack(StrProperty, b'\x02\x00\x00\x00C\x00'), 'C')
+        self.assertEqual(len(table), 1)
+
+    def test_parser_interning(self):
+        fname = os.path.join(os.path.dirname(__file__), 'Test1.bin')
+        table = InternTable()
+        values = []
+        for _ in range(2):
+            with BufferParser(fname, intern=table) as parser:
+                parser.read_header()
+                props = {p.name: p for p in parser.properties()}
+                values.append((props['Country'].value, props['kAppearance'].head))
+        self.assertIs(values[0][0], values[1][0])
+        self.assertIs(values[0][1], values[1][1])
@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest as ut
+import zipfile
+from pools import make_pool
+from xcfp import CharacterPool
+
+NAMES = ['Char{}'.format(i) for i in range(10)]
+
+class TestCharacterPoolIndex(ut.TestCase):
+    """Tests random access to characters through the offset index"""
+
+    def setUp(self):
+        self.pool = CharacterPool(make_pool(NAMES))
+
+    def test_len(self):
+        self.assertEqual(len(self.pool), len(NAMES))
+
+    def test_offsets(self):
+        offsets = self.pool.offsets()
+        for (_, end), (start, _) in zip(offsets, offsets[1:]):
+            self.assertEqual(end, start)
+        self.assertEqual(offsets[-1][1], len(self.pool.fname))
+
+    def test_getitem(self):
+        self.assertEqual(self.pool[0].firstName, 'Char0')
+        self.assertEqual(self.pool[4].firstName, 'Char4')
+        self.assertEqual(self.pool[-1].firstName, 'Char9')
+        with self.assertRaises(IndexError):
+            self.pool[10]
+
+    def test_slice(self):
+        self.assertEqual([c.firstName for c in self.pool[2:5]], NAMES[2:5])
+        self.assertEqual([c.firstName for c in self.pool[::4]], NAMES[::4])
+
+    def test_iter_range(self):
+        chars = self.pool.iter_range(7, 20)
+        self.assertEqual([c.firstName for c in chars], NAMES[7:])
+
+    def test_matches_characters(self):
+        expected = [c.details() for c in self.pool.characters()]
+        self.assertEqual([c.details() for c in self.pool[:]], expected)
+
+class TestCharacterPoolParallel(ut.TestCase):
+    """Tests decoding a single pool on a worker pool"""
+
+    def setUp(self):
+        self.names = ['Char{}'.format(i) for i in range(37)]
+        self.pool = CharacterPool(make_pool(self.names))
+
+    def test_threads(self):
+        chars = self.pool.characters(workers=3, executor='thread')
+        self.assertEqual([c.firstName for c in chars], self.names)
+
+    def test_processes(self):
+        chars = list(self.pool.characters(workers=2))
+        self.assertEqual([c.firstName for c in chars], self.names)
+        self.assertEqual(chars[5].details(), self.pool[5].details())
+        #structs come back already decoded rather than left to this process
+        self.assertIsNone(chars[5].appearance._pending)
+
+class TestCharacterPoolProjection(ut.TestCase):
+    """Tests decoding only some of each character's fields"""
+
+    def setUp(self):
+        self.pool = CharacterPool(make_pool(NAMES[:3]))
+
+    def test_projection(self):
+        chars = list(self.pool.characters(fields=['firstName', 'country']))
+        self.assertEqual([c.firstName for c in chars], NAMES[:3])
+        self.assertEqual(set(chars[0].fields), {'strFirstName', 'Country'})
+        # unprojected fields read as their defaults
+        self.assertEqual(chars[0].lastName, '')
+
+    def test_struct_projection(self):
+        char = next(self.pool.characters(fields=['appearance.gender', 'appearance.race']))
+        self.assertEqual(set(char.fields), {'kAppearance'})
+        self.assertEqual(set(char.appearance.fields), {'iGender', 'iRace'})
+        self.assertEqual(char.appearance.gender, 1)
+
+    def test_whole_struct(self):
+        char = next(self.pool.characters(fields=['appearance.gender', 'appearance']))
+        self.assertEqual(char.appearance.to_dict(), self.pool[0].appearance.to_dict())
+
+    def test_unknown_field(self):
+        with self.assertRaises(KeyError):
+            list(self.pool.characters(fields=['nope']))
+        with self.assertRaises(KeyError):
+            list(self.pool.characters(fields=['firstName.nope']))
+
+class TestLazyStruct(ut.TestCase):
+    """Tests structs are only decoded when their fields are used"""
+
+    def setUp(self):
+        self.char = CharacterPool(make_pool(NAMES[:1]))[0]
+
+    def test_lazy(self):
+        struct = self.char.fields['kAppearance']
+        self.assertFalse(struct.decoded)
+        self.assertEqual(str(self.char.appearance), '<struct: TAppearance>')
+        self.assertFalse(struct.decoded)
+
+        self.assertEqual(self.char.appearance.gender, 1)
+        self.assertTrue(struct.decoded)
+        self.assertEqual(self.char.appearance.haircut, 'MaleHairShort_A')
+
+    def test_pickle_undecoded(self):
+        import pickle
+        char = pickle.loads(pickle.dumps(self.char))
+        self.assertFalse(char.fields['kAppearance'].decoded)
+        self.assertEqual(char.appearance.to_dict(), self.char.appearance.to_dict())
+
+class TestFromArchive(ut.TestCase):
+    """Tests reading pools straight out of zip and tar archives"""
+
+    MEMBERS = {'First.bin': ['A0', 'A1'], 'sub/Second.bin': ['B0']}
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read(self, path):
+        return {name: [char.firstName for char in pool.characters()]
+                for name, pool in CharacterPool.from_archive(path)}
+
+    def test_zip(self):
+        path = os.path.join(self.dir, 'pools.zip')
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, names in self.MEMBERS.items():
+                archive.writestr(name, make_pool(names))
+            archive.writestr('readme.txt', 'not a pool')
+        self.assertEqual(self.read(path), self.MEMBERS)
+
+    def test_tar(self):
+        path = os.path.join(self.dir, 'pools.tar.gz')
+        with tarfile.open(path, 'w:gz') as archive:
+            for name, names in self.MEMBERS.items():
+                data = make_pool(names)
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        self.assertEqual(self.read(path), self.MEMBERS)
+
+    def test_not_archive(self):
+        path = os.path.join(self.dir, 'Pool.bin')
+        with open(path, 'wb') as f:
+            f.write(make_pool(['A0']))
+        with self.assertRaises(ValueError):
+            self.read(path)
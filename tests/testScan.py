@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+
+import unittest as ut
+import os
+import tempfile
+from pools import make_pool
+from xcfp import scan
+from xcfp.parser import XCFParseError
+
+class TestScan(ut.TestCase):
+    """Tests scanning many files in parallel with xcfp.scan()"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(6):
+            fname = os.path.join(self.tmp.name, '{}.bin'.format(i))
+            with open(fname, 'wb') as f:
+                f.write(make_pool(['Char{}'.format(j) for j in range(i)]))
+            self.paths.append(fname)
+
+        self.bad = os.path.join(self.tmp.name, 'bad.bin')
+        with open(self.bad, 'wb') as f:
+            f.write(b'\x00' * 16)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_results(self, results):
+        by_path = {result.path: result for result in results}
+        self.assertEqual(set(by_path), set(self.paths + [self.bad]))
+
+        for i, path in enumerate(self.paths):
+            chars = by_path[path].characters
+            self.assertIsNone(by_path[path].error)
+            self.assertEqual([c['firstName'] for c in chars], ['Char{}'.format(j) for j in range(i)])
+
+        self.assertIsNone(by_path[self.bad].characters)
+        self.assertIsInstance(by_path[self.bad].error, XCFParseError)
+
+    def test_scan_threads(self):
+        self.check_results(scan(self.paths + [self.bad], workers=2, executor='thread'))
+
+    def test_scan_processes(self):
+        self.check_results(scan(self.paths + [self.bad], workers=2))
+
+    def test_scan_ordered(self):
+        paths = self.paths + [self.bad]
+        results = scan(paths, workers=3, executor='thread', ordered=True)
+        self.assertEqual([r.path for r in results], paths)
+
+    def test_scan_appearance(self):
+        result, = scan(self.paths[1:2], executor='thread')
+        self.assertEqual(result.characters[0]['appearance']['gender'], 1)
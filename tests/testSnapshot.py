@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+
+import unittest as ut
+import os
+import tempfile
+from unittest import mock
+from pools import make_pool
+from xcfp import CharacterPool, open_snapshot
+from xcfp.snapshot import SnapshotError
+
+NAMES = ['Char{}'.format(i) for i in range(5)]
+
+class TestSnapshot(ut.TestCase):
+    """Tests writing and reopening columnar snapshots"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmp.name, 'pool.snap')
+        self.pool = CharacterPool(make_pool(NAMES))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        self.pool.export_snapshot(self.fname)
+        with open_snapshot(self.fname) as snapshot:
+            self.assertEqual(len(snapshot), len(NAMES))
+            self.assertEqual([row.to_dict() for row in snapshot],
+                             [char.to_dict() for char in self.pool.characters()])
+            self.assertEqual(snapshot[-1].details(), self.pool[-1].details())
+
+    def test_projected(self):
+        self.pool.export_snapshot(self.fname, ['firstName', 'appearance.gender', 'allowedTypeVIP'])
+        with open_snapshot(self.fname) as snapshot:
+            row = snapshot[3]
+            self.assertEqual(row.firstName, 'Char3')
+            self.assertEqual(row.appearance.gender, 1)
+            self.assertIs(row.allowedTypeVIP, False)
+            self.assertEqual(row.country, 'Country_UK')
+
+    def test_empty(self):
+        CharacterPool(make_pool([])).export_snapshot(self.fname)
+        with open_snapshot(self.fname) as snapshot:
+            self.assertEqual(len(snapshot), 0)
+
+    def test_failed_export(self):
+        self.pool.export_snapshot(self.fname)
+        #fail after the columns have been written
+        with mock.patch('xcfp.snapshot.json.dumps', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.pool.export_snapshot(self.fname)
+        #the snapshot that was there is left alone
+        self.assertEqual(os.listdir(self.tmp.name), ['pool.snap'])
+        with open_snapshot(self.fname) as snapshot:
+            self.assertEqual(len(snapshot), len(NAMES))
+
+    def test_read_only(self):
+        self.pool.export_snapshot(self.fname)
+        with open_snapshot(self.fname) as snapshot, self.assertRaises(TypeError):
+            snapshot.append(self.pool[0])
+
+    def test_bad_file(self):
+        with open(self.fname, 'wb') as f:
+            f.write(bytes(64))
+        with self.assertRaises(SnapshotError):
+            open_snapshot(self.fname)
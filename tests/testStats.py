@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+
+import io
+import unittest as ut
+from pools import make_pool, sample
+from xcfp import CharacterPool
+from xcfp.parser import BufferParser
+from xcfp.stats import ParseStats
+
+NAMES = ['Char{}'.format(i) for i in range(5)]
+
+class Recorder(ParseStats):
+    """Stats that keep every hook call too"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def on_value(self, typename, size, seconds):
+        super().on_value(typename, size, seconds)
+        self.calls.append((typename, size))
+
+class TestParseStats(ut.TestCase):
+    """Tests collecting parse statistics"""
+
+    def setUp(self):
+        self.data = make_pool(NAMES)
+
+    def test_results_unchanged(self):
+        expected = [char.to_dict() for char in CharacterPool(self.data).characters()]
+        chars = CharacterPool(self.data, stats=ParseStats()).characters()
+        self.assertEqual([char.to_dict() for char in chars], expected)
+
+    def test_counts(self):
+        stats = ParseStats()
+        chars = list(CharacterPool(self.data, stats=stats).characters())
+        self.assertEqual(stats.characters, len(NAMES))
+        self.assertEqual(stats.types['TAppearance'].count, len(NAMES))
+        self.assertGreater(stats.types['StrProperty'].bytes, 0)
+        self.assertGreaterEqual(stats.slowest_character, 0)
+        self.assertNotIn('IntProperty', stats.types)
+
+        #struct fields are counted when they're decoded
+        for char in chars:
+            char.appearance.decode()
+        self.assertIn('IntProperty', stats.types)
+
+    def test_frames(self):
+        stats = ParseStats()
+        CharacterPool(sample('Test1.bin'), stats=stats)[0]
+        self.assertGreater(stats.frames, 0)
+        self.assertEqual(stats.types['ArrayProperty'].count, 1)
+
+    def test_reads(self):
+        stats = ParseStats()
+        list(CharacterPool(io.BytesIO(self.data), stats=stats).characters())
+        self.assertEqual(stats.bytes_read, len(self.data))
+        self.assertGreater(stats.reads, 0)
+
+        stats = ParseStats()
+        list(CharacterPool(self.data, stats=stats).characters())
+        self.assertEqual(stats.reads, 0)
+
+    def test_hooks(self):
+        stats = Recorder()
+        list(CharacterPool(self.data, stats=stats).characters(fields=['firstName']))
+        self.assertEqual([call for call in stats.calls if call[0] == 'StrProperty'][1:],
+                         [('StrProperty', len(name) + 5) for name in NAMES])
+
+    def test_disabled(self):
+        parser = BufferParser(self.data)
+        self.assertIsNone(parser.stats)
+        self.assertNotIn('read_frame', vars(parser))
+
+    def test_format(self):
+        stats = ParseStats()
+        list(CharacterPool(self.data, stats=stats).characters())
+        self.assertIn('TAppearance', stats.format())
+        self.assertEqual(stats.to_dict()['characters'], len(NAMES))
+
+if __name__ == "__main__":
+    ut.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+
+import io
+import os
+import shutil
+import tempfile
+import unittest as ut
+from xcfp import CharacterPool
+from xcfp.bench import BENCHMARKS, SUBPROCESS, run_benchmark
+from xcfp.synthetic import generate_pool
+from xcfp.writer import encode_record
+
+def generate(count, **kwargs):
+    f = io.BytesIO()
+    generate_pool(f, count, **kwargs)
+    return f.getvalue()
+
+class TestSynthetic(ut.TestCase):
+    """Tests generating synthetic pools"""
+
+    def test_parses(self):
+        pool = CharacterPool(generate(50))
+        chars = list(pool.characters())
+        self.assertEqual(len(chars), 50)
+        self.assertEqual(chars[0].appearance.struct_name, 'TAppearance')
+        self.assertEqual(len(chars[0].appearance.fields), 37)
+
+    def test_compiled(self):
+        data = generate(20)
+        self.assertEqual([char.to_dict() for char in CharacterPool(data, compiled=True)],
+                         [char.to_dict() for char in CharacterPool(data)])
+
+    def test_deterministic(self):
+        self.assertEqual(generate(20, seed=3), generate(20, seed=3))
+        self.assertNotEqual(generate(20, seed=3), generate(20, seed=4))
+
+    def test_names(self):
+        chars = CharacterPool(generate(200, names=5)).characters(fields=['firstName'])
+        self.assertEqual(len({char.firstName for char in chars}), 5)
+
+    def test_max_biography(self):
+        chars = CharacterPool(generate(50, max_biography=40)).characters(fields=['biography'])
+        self.assertTrue(all(len(char.biography) <= 40 for char in chars))
+
+    def test_round_trip(self):
+        pool = CharacterPool(generate(10))
+        for record, char in pool.records():
+            char.appearance.decode()
+            char.touch('biography')
+            self.assertEqual(encode_record(char), bytes(record))
+
+class TestBench(ut.TestCase):
+    """Smoke tests for the benchmark runner"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.dir, 'Synthetic.bin')
+        generate_pool(self.fname, 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_run_benchmark(self):
+        for name in BENCHMARKS:
+            if name in SUBPROCESS:
+                continue
+            result = run_benchmark(name, self.fname, repeat=1)
+            self.assertEqual(result['characters'], 10, name)
+            self.assertGreater(result['chars_per_sec'], 0, name)
+            self.assertIn('peak_rss_kb', result)
+            self.assertIn('peak_alloc_bytes_per_char', result)
+
+    def test_cli(self):
+        result = run_benchmark('cli', self.fname, repeat=1)
+        self.assertEqual(result['characters'], 10)
+        #tracemalloc can't see into the child process
+        self.assertIsNone(result['peak_alloc_bytes_per_char'])
+
+if __name__ == "__main__":
+    ut.main()
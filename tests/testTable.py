@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+
+import unittest as ut
+from pools import make_pool
+from xcfp import CharacterPool, CharacterTable, Character
+
+NAMES = ['Char{}'.format(i) for i in range(4)]
+
+class TestSlots(ut.TestCase):
+    """Tests decoded objects don't carry an instance __dict__"""
+
+    def test_no_dict(self):
+        char = CharacterPool(make_pool(NAMES[:1]))[0]
+        for obj in (char, char.fields['strFirstName'], char.appearance,
+                    char.appearance.fields['iGender']):
+            with self.subTest(obj=type(obj).__name__):
+                self.assertFalse(hasattr(obj, '__dict__'))
+
+class TestCharacterTable(ut.TestCase):
+    """Tests the columnar CharacterTable"""
+
+    def setUp(self):
+        self.pool = CharacterPool(make_pool(NAMES))
+
+    def test_rows_match_characters(self):
+        table = self.pool.to_table()
+        self.assertEqual(len(table), len(NAMES))
+        self.assertEqual([row.to_dict() for row in table],
+                         [char.to_dict() for char in self.pool.characters()])
+        self.assertEqual(table[1].details(), self.pool[1].details())
+        self.assertEqual(str(table[-1]), str(self.pool[-1]))
+
+    def test_attributes(self):
+        row = self.pool.to_table()[2]
+        self.assertEqual(row.firstName, 'Char2')
+        self.assertEqual(row.appearance.gender, 1)
+        self.assertIs(row.allowedTypeVIP, False)
+        with self.assertRaises(AttributeError):
+            row.nope
+
+    def test_projected(self):
+        table = self.pool.to_table(fields=['firstName', 'appearance.gender'])
+        self.assertEqual(list(table.columns), ['firstName', 'appearance.gender'])
+        self.assertEqual(list(table.column('appearance.gender')), [1] * len(NAMES))
+        # fields that weren't stored read as defaults
+        self.assertEqual(table[0].lastName, '')
+
+    def test_shared_strings(self):
+        table = self.pool.to_table()
+        countries = table.column('country')
+        self.assertIs(countries[0], countries[1])
+
+    def test_field_paths(self):
+        paths = Character.field_paths()
+        self.assertIn('firstName', paths)
+        self.assertIn('appearance.gender', paths)
+        self.assertNotIn('appearance', paths)
+        with self.assertRaises(KeyError):
+            CharacterTable(['appearance'])
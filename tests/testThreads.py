@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+
+import sys
+import threading
+import unittest as ut
+from concurrent.futures import ThreadPoolExecutor
+from pools import make_pool, sample
+from xcfp import CharacterPool, Property
+from xcfp.parser import SHARED_INTERN
+from xcfp.properties import PropertyType
+
+POOLS = [make_pool(['Pool{}Char{}'.format(p, c) for c in range(10)]) for p in range(8)]
+
+def serial(data, **kwargs):
+    return [char.to_dict() for char in CharacterPool(data, **kwargs).characters()]
+
+class TestThreadedParsing(ut.TestCase):
+    """Stress tests parsing from many threads at once against serial results"""
+
+    def setUp(self):
+        self.expected = [serial(data) for data in POOLS]
+
+    def check_concurrent(self, **kwargs):
+        with ThreadPoolExecutor(8) as executor:
+            for _ in range(3):
+                futures = [executor.submit(serial, data, **kwargs) for data in POOLS * 2]
+                results = [future.result() for future in futures]
+                self.assertEqual(results, self.expected * 2)
+
+    def test_concurrent_pools(self):
+        self.check_concurrent()
+
+    def test_concurrent_compiled(self):
+        self.check_concurrent(compiled=True)
+
+    def test_concurrent_shared_intern(self):
+        self.check_concurrent(intern=SHARED_INTERN)
+
+    def test_characters_threaded(self):
+        pool = CharacterPool(POOLS[0])
+        with ThreadPoolExecutor(4) as executor:
+            chars = pool.characters_threaded(executor, workers=4)
+            self.assertEqual([char.to_dict() for char in chars], self.expected[0])
+
+    def test_characters_threaded_fields(self):
+        pool = CharacterPool(POOLS[1])
+        with ThreadPoolExecutor(4) as executor:
+            chars = pool.characters_threaded(executor, fields=['firstName'])
+            self.assertEqual([char.firstName for char in chars],
+                             [char['firstName'] for char in self.expected[1]])
+
+    def test_shared_first_touch(self):
+        #structs decode when first used, which several threads can do to the
+        #same characters at once
+        expected = [char['appearance'] for data in POOLS for char in serial(data)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for compiled in (False, True):
+                with ThreadPoolExecutor(4) as executor:
+                    chars = []
+                    for data in POOLS:
+                        chars.extend(CharacterPool(data, compiled=compiled).characters_threaded(executor))
+
+                    barrier = threading.Barrier(4)
+                    def touch():
+                        barrier.wait()
+                        return [char.appearance.to_dict() for char in chars]
+
+                    futures = [executor.submit(touch) for _ in range(4)]
+                    for future in futures:
+                        self.assertEqual(future.result(), expected)
+        finally:
+            sys.setswitchinterval(interval)
+
+    def test_register_while_parsing(self):
+        stop = threading.Event()
+
+        def churn():
+            while not stop.is_set():
+                class ChurnProperty(Property):
+                    typename = 'ChurnProperty'
+                PropertyType.deregister(ChurnProperty)
+
+        thread = threading.Thread(target=churn)
+        thread.start()
+        try:
+            self.check_concurrent()
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_struct_names_per_instance(self):
+        char = CharacterPool(sample('Test1.bin'))[0]
+        self.assertEqual(char.appearance.struct_name, 'TAppearance')
+        self.assertEqual(PropertyType('StructProperty').typename, 'StructProperty')
+
+if __name__ == "__main__":
+    ut.main()
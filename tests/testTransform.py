@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+
+import io
+import os
+import shutil
+import tempfile
+import unittest as ut
+from pools import make_pool, sample, HEADER_SIZE
+from xcfp import CharacterPool, transform
+from xcfp.parser import Parser, XCFParseError
+
+NAMES = ['Char{}'.format(i) for i in range(4)]
+
+def retag(char):
+    char.country = 'Country_US'
+    char.biography = ''
+
+class Stream(io.BytesIO):
+    """A stream that can only be read or written forwards, like stdin/stdout"""
+
+    def seekable(self):
+        return False
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation("not seekable")
+
+    def tell(self):
+        raise io.UnsupportedOperation("not seekable")
+
+class TestTransform(ut.TestCase):
+    """Tests streaming edits from one pool to another"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.src = os.path.join(self.dir, 'Pool.bin')
+        with open(self.src, 'wb') as f:
+            f.write(make_pool(NAMES))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def check(self, data):
+        chars = list(CharacterPool(data))
+        self.assertEqual([c.firstName for c in chars], NAMES)
+        for char in chars:
+            self.assertEqual(char.country, 'Country_US')
+            self.assertEqual(char.biography, '')
+            self.assertEqual(char.lastName, 'McTestington')
+
+    def test_files(self):
+        dst = os.path.join(self.dir, 'Out.bin')
+        self.assertEqual(transform(self.src, dst, retag), len(NAMES))
+        with open(dst, 'rb') as f:
+            self.check(f.read())
+
+    def test_streams(self):
+        out = Stream()
+        transform(CharacterPool(Stream(make_pool(NAMES))), out, retag)
+        self.check(out.getvalue())
+
+    def test_concatenated(self):
+        data = make_pool(NAMES[:3]) + sample('Empty.bin') + make_pool(NAMES[3:])
+        dst = os.path.join(self.dir, 'Out.bin')
+        self.assertEqual(transform(Stream(data), dst, retag), len(NAMES))
+        with open(dst, 'rb') as f:
+            self.check(f.read())
+
+        out = io.BytesIO()
+        self.assertEqual(transform(CharacterPool(data), out, retag), len(NAMES))
+        self.check(out.getvalue())
+
+        #a stream can't have its header fixed up afterwards
+        with self.assertRaises(XCFParseError):
+            transform(CharacterPool(data), Stream(), retag)
+
+        with self.assertRaises(XCFParseError):
+            transform(CharacterPool(make_pool(NAMES) + b'junk'), io.BytesIO(), retag)
+
+    def test_read_raw_properties(self):
+        record = sample('Test1.bin')[HEADER_SIZE:]
+        with Parser(Stream(sample('Test1.bin'))) as parser:
+            parser.read_header()
+            self.assertEqual(parser.read_raw_properties(), record)
+
+    def test_unchanged(self):
+        out = io.BytesIO()
+        transform(CharacterPool(sample('Test1.bin')), out, lambda char: None,
+                  'CharacterPool\\Importable\\Test1.bin')
+        self.assertEqual(out.getvalue(), sample('Test1.bin'))
+
+if __name__ == "__main__":
+    ut.main()
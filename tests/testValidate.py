@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+
+import struct
+import unittest as ut
+from pools import make_pool, sample, HEADER_SIZE
+from xcfp import CharacterPool
+from xcfp.validate import validate
+
+#offset of the length of strFirstName's value in Test1.bin
+FIRST_NAME_VALUE = HEADER_SIZE + 49
+
+def corrupt(data, offset, value):
+    data = bytearray(data)
+    struct.pack_into('<i', data, offset, value)
+    return bytes(data)
+
+class TestValidate(ut.TestCase):
+    """Tests checking pool structure without decoding"""
+
+    def setUp(self):
+        self.data = sample('Test1.bin')
+
+    def test_valid(self):
+        for data in (self.data, sample('Empty.bin'), make_pool(['A', 'B', 'C'])):
+            for strict in (False, True):
+                report = validate(data, strict)
+                self.assertTrue(report.valid, report.problems)
+                self.assertEqual(report.records, report.count)
+        self.assertEqual(validate(make_pool(['A', 'B', 'C'])).count, 3)
+
+    def test_pool(self):
+        report = CharacterPool(self.data).validate()
+        self.assertTrue(report)
+        self.assertEqual(report.to_dict()['records'], 1)
+        self.assertEqual(str(report), '<buffer>: OK, 1 characters')
+        self.assertTrue(str(validate(self.data[:-7])).startswith('<buffer>:'))
+
+    def test_magic(self):
+        report = validate(corrupt(self.data, 0, 0))
+        self.assertFalse(report)
+        self.assertEqual(report.problems[0].offset, 0)
+        self.assertIn('Magic', report.problems[0].message)
+        self.assertIsNone(report.count)
+
+    def test_counts(self):
+        report = validate(corrupt(self.data, HEADER_SIZE - 4, 2))
+        self.assertEqual([(problem.offset, problem.record) for problem in report.problems],
+                         [(HEADER_SIZE - 4, None)])
+        self.assertIn('Mismatched', report.problems[0].message)
+
+    def test_padding_in_struct(self):
+        #problems inside a struct don't stop the rest of the record being
+        #walked
+        offset = self.data.index(b'iGender') + 8
+        report = validate(corrupt(self.data, offset, 1))
+        self.assertEqual(len(report.problems), 1)
+        self.assertEqual(report.problems[0].offset, offset)
+        self.assertEqual(report.problems[0].record, 0)
+        self.assertEqual(report.records, 1)
+
+    def test_unknown_type(self):
+        offset = self.data.index(b'IntProperty')
+        data = self.data[:offset] + b'IntPropertx' + self.data[offset + 11:]
+        report = validate(data)
+        self.assertEqual(len(report.problems), 1)
+        self.assertIn('IntPropertx', report.problems[0].message)
+        self.assertEqual(report.records, 1)
+
+    def test_truncated(self):
+        report = validate(self.data[:-7])
+        self.assertFalse(report)
+        self.assertEqual(report.records, 0)
+        self.assertEqual(report.problems[0].record, 0)
+
+    def test_strict(self):
+        data = corrupt(self.data, FIRST_NAME_VALUE, 5)
+        self.assertTrue(validate(data))
+        report = validate(data, strict=True)
+        self.assertEqual(len(report.problems), 1)
+        self.assertEqual(report.problems[0].offset, HEADER_SIZE)
+
+        data = self.data + b'\x00'
+        self.assertTrue(validate(data))
+        self.assertEqual(validate(data, strict=True).problems[0].offset, len(self.data))
+
+if __name__ == "__main__":
+    ut.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import unittest as ut
+from pools import make_pool, sample, HEADER_SIZE
+from xcfp import Character, CharacterPool, Property
+from xcfp.properties import PropertyError
+from xcfp.parser import BufferParser
+from xcfp.writer import PoolWriter, encode_header
+
+def decode(record):
+    return Character(BufferParser(record).properties())
+
+class TestEncode(ut.TestCase):
+    """Tests encoding properties and characters back to the file format"""
+
+    def setUp(self):
+        self.data = sample('Test1.bin')
+        self.char = CharacterPool(self.data)[0]
+
+    def test_pack_inverts_unpack(self):
+        for typename, value in [('IntProperty', -7), ('BoolProperty', True),
+                                ('StrProperty', 'Ünïcode'), ('NameProperty', ('Name', 3))]:
+            cls = type(Property('x', typename))
+            self.assertEqual(cls.unpack(cls.pack(value)), value)
+
+    def test_name_param_kept(self):
+        eyes = self.char.appearance.fields['nmEye']
+        self.assertEqual((eyes.value, eyes.param), ('DefaultEyes', 2))
+
+    def test_unmodified_is_source(self):
+        self.assertFalse(self.char.modified)
+        self.assertIs(self.char.to_bytes(), self.char.source)
+
+    def test_full_encode_matches_file(self):
+        self.char.source = None
+        self.assertEqual(self.char.to_bytes(), self.data[HEADER_SIZE:])
+
+    def test_compiled_encode_matches_file(self):
+        char = CharacterPool(self.data, compiled=True)[0]
+        char.source = None
+        self.assertEqual(char.to_bytes(), self.data[HEADER_SIZE:])
+
+    def test_headers_match_samples(self):
+        self.assertEqual(encode_header(1, 'CharacterPool\\Importable\\Test1.bin'),
+                         self.data[:HEADER_SIZE])
+        self.assertEqual(encode_header(0, 'CharacterPool\\Importable\\Empty.bin'),
+                         sample('Empty.bin'))
+
+    def test_patch(self):
+        self.char.firstName = 'Zed'
+        self.char.appearance.gender = 2
+        self.assertEqual(self.char.dirty, {'strFirstName'})
+        self.assertTrue(self.char.modified)
+
+        char = decode(self.char.to_bytes())
+        self.assertEqual(char.firstName, 'Zed')
+        self.assertEqual(char.appearance.gender, 2)
+        self.assertEqual(char.lastName, self.char.lastName)
+
+    def test_patch_projected(self):
+        #fields a projection skipped are copied across untouched
+        char = next(CharacterPool(self.data).characters(fields=['nickName']))
+        char.nickName = 'Nick'
+        result = decode(char.to_bytes())
+        self.assertEqual(result.nickName, 'Nick')
+        self.assertEqual(result.lastName, self.char.lastName)
+        self.assertEqual(result.appearance.to_dict(), self.char.appearance.to_dict())
+
+    def test_missing_struct(self):
+        #a character without its own appearance reads the shared default,
+        #which can't be changed through it
+        for char in (Character(), next(CharacterPool(self.data).characters(fields=['nickName']))):
+            with self.assertRaises(PropertyError):
+                char.appearance.gender = 1
+        self.assertEqual(Character().appearance.gender, Character.appearance.gender)
+
+    def test_pickle(self):
+        self.char.appearance.gender = 2
+        char = pickle.loads(pickle.dumps(self.char))
+        self.assertEqual(char.to_bytes(), self.char.to_bytes())
+
+class TestSave(ut.TestCase):
+    """Tests writing whole pools"""
+
+    NAMES = ['Char{}'.format(i) for i in range(5)]
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.dir, 'Pool.bin')
+        with open(self.fname, 'wb') as f:
+            f.write(make_pool(self.NAMES))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        dest = os.path.join(self.dir, 'Test1.bin')
+        pool = CharacterPool(sample('Test1.bin'))
+        pool.save(dest=dest, characters=list(pool))
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), sample('Test1.bin'))
+
+    def test_save_in_place(self):
+        pool = CharacterPool(self.fname)
+        chars = list(pool)
+        chars[2].firstName = 'Changed'
+        pool.save(chars)
+        self.assertEqual([c.firstName for c in CharacterPool(self.fname)],
+                         ['Char0', 'Char1', 'Changed', 'Char3', 'Char4'])
+        self.assertEqual(len(pool), 5)
+
+    def test_save_updates(self):
+        pool = CharacterPool(self.fname)
+        char = pool[0]
+        char.lastName = 'Moved'
+        pool.save(updates={4: char})
+        last = CharacterPool(self.fname)[4]
+        self.assertEqual((last.firstName, last.lastName), ('Char0', 'Moved'))
+
+    def test_save_empty(self):
+        dest = os.path.join(self.dir, 'Empty.bin')
+        CharacterPool(self.fname).save(characters=[], dest=dest)
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), sample('Empty.bin'))
+
+    def test_streaming(self):
+        out = io.BytesIO()
+        with PoolWriter(out, 'CharacterPool\\Importable\\Test1.bin') as writer:
+            writer.write_header(1)
+            writer.write_record(CharacterPool(self.fname)[0])
+        self.assertEqual(CharacterPool(out.getvalue())[0].firstName, 'Char0')
+
+    def test_incomplete(self):
+        dest = os.path.join(self.dir, 'Short.bin')
+        with self.assertRaises(ValueError):
+            with PoolWriter(dest) as writer:
+                writer.write_header(2)
+                writer.write_record(CharacterPool(self.fname)[0])
+        self.assertEqual(os.listdir(self.dir), ['Pool.bin'])
+
+if __name__ == "__main__":
+    ut.main()
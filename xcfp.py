@@ -1,13 +1,6 @@
 #!/usr/bin/python3
-from struct import pack,unpack
-from xcfp import CharacterPool
+import sys
+from xcfp.cli import main
 
 if __name__ == "__main__":
-    from sys import argv
-    if len(argv) < 2:
-        print("Usage: {} character_file".format(argv[0]))
-        exit(1)
-
-    pool = CharacterPool(argv[1])
-    for char in pool.characters():
-        print(char.details())
+    sys.exit(main())
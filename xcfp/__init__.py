@@ -1,3 +1,13 @@
 from .character import Character
 from .properties import Property
 from .pool import CharacterPool
+from .cache import IndexCache
+from .scan import scan, ScanResult
+from .table import CharacterTable
+from .snapshot import open_snapshot
+from .index import PoolIndex
+from .writer import PoolWriter
+from .merge import merge
+from .transform import transform
+from .aio import AsyncParser
+from .dedup import dedup
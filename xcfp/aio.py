@@ -0,0 +1,91 @@
+"""Reading pools from asyncio streams.
+
+An AsyncParser reads its source in large chunks into a buffer and runs the
+ordinary BufferParser over what has arrived so far. Anything that runs out of
+data before it's done is retried once the next chunk is in, so the header and
+each record are decoded as soon as all their bytes are available, without
+waiting for the rest of the stream"""
+
+from .parser import BufferParser
+
+CHUNK_SIZE = 1 << 16
+
+async def _chunks(source, chunk_size):
+    if hasattr(source, 'read'):
+        #asyncio.StreamReader and the like
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        async for chunk in source:
+            if chunk:
+                yield chunk
+
+class AsyncParser():
+    """Incrementally parses a pool from 'source', either an object with a
+    read(n) coroutine such as an asyncio.StreamReader or an async iterable of
+    bytes chunks. 'chunk_size' is how much to ask read() for at a time.
+
+    'types' is as for Parser"""
+
+    def __init__(self, source, chunk_size=CHUNK_SIZE, types=None):
+        self.chunks = _chunks(source, chunk_size)
+        self.types = types
+        self.data = b''
+        self.pos = 0
+        self.eof = False
+
+    async def fill(self):
+        """read another chunk into the buffer, dropping what has already been
+        parsed. Returns False at the end of the source"""
+        if self.eof:
+            return False
+        try:
+            chunk = await self.chunks.__anext__()
+        except StopAsyncIteration:
+            self.eof = True
+            return False
+        self.data = self.data[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    async def parse(self, fn):
+        """returns fn(parser) for a BufferParser positioned at the next unread
+        byte, reading more of the source and trying again whenever fn runs out
+        of data"""
+        while True:
+            parser = BufferParser(self.data, types=self.types)
+            parser.pos = self.pos
+            try:
+                result = fn(parser)
+            except IOError:
+                #wait for the unparsed data to at least double so a trickle
+                #of small chunks doesn't mean parsing the same bytes over and
+                #over
+                target = 2 * (len(self.data) - self.pos)
+                grew = False
+                while await self.fill():
+                    grew = True
+                    if len(self.data) - self.pos >= target:
+                        break
+                if not grew:
+                    raise
+                continue
+            self.pos = parser.pos
+            return result
+
+    async def read_header(self):
+        """reads the header, returns the number of characters in the pool"""
+        return await self.parse(BufferParser.read_header)
+
+    async def read_raw_properties(self):
+        """returns the raw bytes of the next property block"""
+        return await self.parse(lambda parser: bytes(parser.read_raw_properties()))
+
+    async def records(self):
+        """yields the raw bytes of each character record"""
+        count = await self.read_header()
+        for _ in range(count):
+            yield await self.read_raw_properties()
@@ -0,0 +1,24 @@
+import tarfile
+import zipfile
+
+def archive_members(path, suffix='.bin'):
+    """yields (name, file object) for each member of zip or tar archive
+    'path' whose name ends with 'suffix'. Tar archives are read as a stream
+    so each file object is only valid until the next one is yielded"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(suffix):
+                    with archive.open(info) as f:
+                        yield (info.filename, f)
+        return
+
+    try:
+        archive = tarfile.open(path, 'r|*')
+    except tarfile.ReadError:
+        raise ValueError("Not a zip or tar archive: {}".format(path))
+
+    with archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(suffix):
+                yield (member.name, archive.extractfile(member))
@@ -0,0 +1,183 @@
+"""Parser benchmarks.
+
+    python -m xcfp.bench [-n COUNT] [--seed SEED] [--repeat N] [--only NAME]
+                         [--output FILE] [POOL]
+
+Times each benchmark over POOL, or over a pool of COUNT synthetic characters
+(see xcfp.synthetic) when no file is given, and writes a JSON report for
+comparing runs. Every benchmark runs in a fresh interpreter so its peak RSS
+is its own. For each one the report has the best time of 'repeat' runs,
+characters and MB per second, peak RSS and the peak memory allocated per
+character as traced by tracemalloc (None for the cli benchmark, which runs
+in a child process tracemalloc can't see)"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from .pool import CharacterPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# each benchmark is (setup, run), setup(fname) is untimed and run(state) does
+# the work, returning the number of characters it handled
+
+def _pool_characters(compiled):
+    def run(fname):
+        return sum(1 for _ in CharacterPool(fname, compiled=compiled).characters())
+    return (lambda fname: fname, run)
+
+def _read_property(fname):
+    count = 0
+    with CharacterPool(fname).parser() as parser:
+        for _ in range(parser.read_header()):
+            while parser.read_property() is not None:
+                pass
+            count += 1
+    return count
+
+def _struct_setup(fname):
+    return list(CharacterPool(fname).characters(fields=['appearance']))
+
+def _struct_decode(chars):
+    for char in chars:
+        char.appearance.decode()
+    return len(chars)
+
+def _cli_setup(fname):
+    return (fname, len(CharacterPool(fname)))
+
+def _cli(state):
+    fname, count = state
+    with open(os.devnull, 'wb') as devnull:
+        subprocess.run([sys.executable, os.path.join(ROOT, 'xcfp.py'), fname],
+                       stdout=devnull, check=True)
+    return count
+
+BENCHMARKS = {
+    'characters': _pool_characters(False),
+    'characters_compiled': _pool_characters(True),
+    'read_property': (lambda fname: fname, _read_property),
+    'struct_decode': (_struct_setup, _struct_decode),
+    'cli': (_cli_setup, _cli),
+}
+
+#benchmarks whose work happens in a child process, so their memory use can
+#only be seen through the children's peak RSS
+SUBPROCESS = frozenset(['cli'])
+
+def peak_rss(children=False):
+    """peak resident set size in KiB, None where it can't be measured"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    #macOS reports bytes, everything else KiB
+    return usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+
+def run_benchmark(name, fname, repeat=3):
+    """run benchmark 'name' over pool 'fname' in this process and return its
+    results as a dict"""
+    setup, run = BENCHMARKS[name]
+
+    times = []
+    for _ in range(repeat):
+        state = setup(fname)
+        start = time.perf_counter()
+        count = run(state)
+        times.append(time.perf_counter() - start)
+    seconds = min(times)
+
+    alloc_per_char = None
+    if name not in SUBPROCESS:
+        state = setup(fname)
+        tracemalloc.start()
+        run(state)
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if count:
+            alloc_per_char = traced_peak / count
+
+    size = os.path.getsize(fname)
+    return {
+        'seconds': seconds,
+        'characters': count,
+        'chars_per_sec': count / seconds if seconds else None,
+        'mb_per_sec': size / seconds / 1e6 if seconds else None,
+        'peak_rss_kb': peak_rss(children=name in SUBPROCESS),
+        'peak_alloc_bytes_per_char': alloc_per_char,
+    }
+
+def run_isolated(name, fname, repeat=3):
+    """run_benchmark() in a new interpreter"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (ROOT, env.get('PYTHONPATH'))))
+    output = subprocess.run(
+        [sys.executable, '-m', 'xcfp.bench', '--run', name, '--repeat', str(repeat), fname],
+        stdout=subprocess.PIPE, check=True, env=env).stdout
+    return json.loads(output)
+
+def benchmark(fname, names=None, repeat=3):
+    """run the named benchmarks (default all of them) over pool 'fname' and
+    return the full report"""
+    if names is None:
+        names = [name for name in BENCHMARKS
+                 if name != 'cli' or os.path.exists(os.path.join(ROOT, 'xcfp.py'))]
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'file': fname,
+        'bytes': os.path.getsize(fname),
+        'repeat': repeat,
+        'results': {name: run_isolated(name, fname, repeat) for name in names},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m xcfp.bench', description="Benchmark pool parsing")
+    parser.add_argument('pool', nargs='?', help="pool file, default a synthetic one")
+    parser.add_argument('-n', '--count', type=int, default=5000,
+                        help="characters in the synthetic pool")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the synthetic pool")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each benchmark")
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS),
+                        help="benchmark to run, can be given more than once")
+    parser.add_argument('--output', help="write the report here rather than stdout")
+    parser.add_argument('--run', choices=sorted(BENCHMARKS), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        json.dump(run_benchmark(args.run, args.pool, args.repeat), sys.stdout)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = args.pool
+        if fname is None:
+            from .synthetic import generate_pool
+            fname = os.path.join(tmp, 'Synthetic.bin')
+            generate_pool(fname, args.count, args.seed)
+
+        report = benchmark(fname, args.only, args.repeat)
+        if args.pool is None:
+            report['synthetic'] = {'count': args.count, 'seed': args.seed}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import tempfile
+
+class IndexCache():
+    """On disk cache of CharacterPool record offsets and character summaries.
+
+    With no cache_dir each entry is a sidecar file next to its pool
+    (pool.bin -> pool.bin.xcfpidx), otherwise entries live in cache_dir named
+    after a hash of the pool's path. A cache_dir is kept to at most
+    max_entries files (and max_bytes in total if given) by throwing away the
+    least recently used entries. The directory is only scanned when the
+    running total of what's been stored goes over a limit, and then enough is
+    thrown away to leave EVICT_HEADROOM of each limit free.
+
+    Entries are keyed on the pool's path, size, mtime and a hash of its
+    contents and are discarded as soon as any of those change. To keep lookups
+    from reading the whole pool the content hash only covers the first and
+    last HASH_BLOCK bytes of the file"""
+
+    SUFFIX = '.xcfpidx'
+    VERSION = 1
+    HASH_BLOCK = 64 * 1024
+    EVICT_HEADROOM = 0.1
+
+    def __init__(self, cache_dir=None, max_entries=10000, max_bytes=None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        #what's in cache_dir as of the last evict() plus what's been stored
+        #since, None until it has been scanned
+        self._count = None
+        self._bytes = None
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, fname):
+        """returns the file the cache entry for pool 'fname' is stored in"""
+        path = os.path.abspath(fname)
+        if self.cache_dir is None:
+            return path + self.SUFFIX
+        key = hashlib.sha1(path.encode('utf-8', 'surrogateescape')).hexdigest()
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def identity(self, fname, stat=None):
+        """returns the dict identifying the current contents of pool 'fname'"""
+        if stat is None:
+            stat = os.stat(fname)
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(fname, 'rb') as f:
+            digest.update(f.read(self.HASH_BLOCK))
+            if stat.st_size > self.HASH_BLOCK:
+                f.seek(max(self.HASH_BLOCK, stat.st_size - self.HASH_BLOCK))
+                digest.update(f.read())
+
+        return {
+            'path': os.path.abspath(fname),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': digest.hexdigest(),
+        }
+
+    def load(self, fname):
+        """returns the cached (offsets, summaries) for pool 'fname' or None if
+        there is no valid entry. Stale entries are removed"""
+        entry_path = self.entry_path(fname)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        stat = os.stat(fname)
+        key = entry.get('key', {})
+        valid = (entry.get('version') == self.VERSION
+                 and key.get('path') == os.path.abspath(fname)
+                 and key.get('size') == stat.st_size
+                 and key.get('mtime') == stat.st_mtime_ns
+                 and key == self.identity(fname, stat))
+
+        if not valid:
+            self._remove(entry_path)
+            return None
+
+        #bump the entry's mtime so eviction sees it as recently used
+        if self.cache_dir is not None:
+            try:
+                os.utime(entry_path)
+            except OSError:
+                pass
+
+        offsets = [tuple(offset) for offset in entry['offsets']]
+        return (offsets, entry['summaries'])
+
+    def store(self, fname, offsets, summaries):
+        """store the offsets and summaries for pool 'fname'. Failing to write
+        the cache is not an error, the pool just gets indexed again next time"""
+        entry = {
+            'version': self.VERSION,
+            'key': self.identity(fname),
+            'offsets': offsets,
+            'summaries': summaries,
+        }
+
+        entry_path = self.entry_path(fname)
+        try:
+            old_size = os.stat(entry_path).st_size
+        except OSError:
+            old_size = None
+        #a new temporary file for each store, so threads storing the same
+        #pool don't write over each other
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(entry_path))
+        except OSError:
+            return
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, separators=(',', ':'))
+                size = f.tell()
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            self._remove(tmp_path)
+            return
+
+        if self.cache_dir is None:
+            return
+        if self._count is None:
+            self.evict()
+            return
+        if old_size is None:
+            self._count += 1
+        self._bytes += size - (old_size or 0)
+        if self._count > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            self.evict()
+
+    def evict(self):
+        """remove least recently used entries from cache_dir if it is over
+        max_entries or max_bytes, until it is EVICT_HEADROOM under both"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for dirent in it:
+                if not dirent.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = dirent.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, dirent.path))
+
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        if count > self.max_entries or (self.max_bytes is not None and total > self.max_bytes):
+            keep = 1 - self.EVICT_HEADROOM
+            max_entries = int(self.max_entries * keep) or self.max_entries
+            max_bytes = None if self.max_bytes is None else self.max_bytes * keep
+            entries.sort()
+            for _, size, path in entries:
+                if count <= max_entries and (max_bytes is None or total <= max_bytes):
+                    break
+                self._remove(path)
+                count -= 1
+                total -= size
+        self._count = count
+        self._bytes = total
+
+    def clear(self, fname):
+        """remove any cache entry for pool 'fname'"""
+        self._remove(self.entry_path(fname))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
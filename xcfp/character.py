@@ -4,6 +4,8 @@ from .property_set import PropertySet
 class Character(PropertySet):
     """Represents an XCOM 2 character in a character pool file"""
 
+    __slots__ = ('fields', 'source', 'dirty')
+
     # template for per instance field OrederedDicts
     firstName = Property('strFirstName', 'StrProperty', '')
     lastName  = Property('strLastName', 'StrProperty', '')
@@ -23,13 +25,36 @@ class Character(PropertySet):
     timestamp = Property('PoolTimestamp', 'StrProperty', '')
     biography = Property('BackgroundText', 'StrProperty', '')
 
+    # fields kept in a CharacterPool's index cache
+    summary_fields = ('firstName', 'lastName', 'nickName', 'country',
+                      'soldierClass', 'characterTemplate')
+
     def __str__(self):
         fields = filter(None, (self.firstName, self.nickName, self.lastName))
         return ' '.join(fields)
 
-    def details(self):
-        result = ""
-        for name in self.field_names.keys():
-            result += "{}: {}\n".format(name, getattr(self, name))
+    def __getstate__(self):
+        #the source is usually a view of the pool file, which can't be pickled
+        source = self.source
+        if source is not None:
+            source = bytes(source)
+        return (self.fields, source, self.dirty)
 
-        return result
+    def __setstate__(self, state):
+        self.fields, self.source, self.dirty = state
+
+    def details(self):
+        return ''.join(["{}: {}\n".format(name, getattr(self, name))
+                        for name in self.field_names])
+
+    def content_hash(self, ignore=()):
+        """returns a hex digest of this character's encoded record, the same
+        for any characters with the same properties and values in the same
+        order. 'ignore' is attribute names of properties to leave out, e.g.
+        ['timestamp'], see xcfp.dedup"""
+        from .dedup import record_hash, property_names
+        return record_hash(self.to_bytes(), property_names(ignore, type(self))).hex()
+
+    def summary(self):
+        """returns a dict of the summary_fields of this character"""
+        return {name: getattr(self, name) for name in self.summary_fields}
@@ -0,0 +1,290 @@
+"""The xcfp.py command line tool.
+
+    xcfp.py [-f details|jsonl|csv] [--fields F,...] [-j WORKERS] [--stats]
+            [--validate [--strict]] PATH [PATH ...]
+
+Each PATH is a pool file, '-' for stdin, a directory to search for .bin
+files or a glob. Characters are formatted and written out BATCH_SIZE at a
+time, so output starts straight away and memory use doesn't grow with the
+size of a file. With more than one worker files are handled a whole file at
+a time on a pool of worker processes, each writing to a temporary file that
+is copied to stdout in order. A file that can't be read is reported on
+stderr and the rest carry on, the exit status is 1 if any failed.
+
+--validate checks each file's structure without decoding it (see
+xcfp.validate) and prints a report for it instead, invalid files count as
+failed"""
+
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from collections import deque, namedtuple
+from concurrent.futures import Future
+from functools import partial
+from itertools import islice
+from operator import attrgetter
+
+from .character import Character
+from .parser import XCFParseError
+from .pool import CharacterPool
+from .stats import ParseStats
+
+FORMATS = ('details', 'jsonl', 'csv')
+
+#how much output to gather before writing it to stdout
+OUTPUT_BUFFER = 1 << 20
+
+#characters formatted at once
+BATCH_SIZE = 256
+
+FileResult = namedtuple('FileResult', ('path', 'count', 'error', 'stats'))
+FileResult.__doc__ = """Result of writing out one file, 'count' characters
+of it. If the file couldn't be read, or only partly, 'error' holds the
+exception"""
+
+def expand_paths(paths, suffix='.bin'):
+    """yields the files named by 'paths', searching directories for files
+    ending in 'suffix' and expanding globs. Anything else, including globs
+    that match nothing, is passed through to fail when it's opened"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(suffix):
+                        yield os.path.join(root, name)
+        elif path != '-' and glob.has_magic(path):
+            matches = sorted(glob.glob(path, recursive=True))
+            yield from matches or [path]
+        else:
+            yield path
+
+def format_characters(chars, fmt, fields=None):
+    """returns the text for 'chars' in format 'fmt', only including the
+    dotted attribute names in 'fields' if given. CSV output has no header,
+    see csv_header()"""
+    if fmt == 'details':
+        return ''.join(char.details() + '\n' for char in chars)
+
+    if fmt == 'jsonl':
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        if fields is None:
+            return ''.join(encode(char.to_dict()) + '\n' for char in chars)
+        getters = [(field, attrgetter(field)) for field in fields]
+        return ''.join(encode({field: get(char) for field, get in getters}) + '\n'
+                       for char in chars)
+
+    if fmt == 'csv':
+        getters = [attrgetter(field) for field in fields or Character.field_paths()]
+        buf = io.StringIO()
+        csv.writer(buf).writerows([get(char) for get in getters] for char in chars)
+        return buf.getvalue()
+
+    raise ValueError("Unknown format: {}".format(fmt))
+
+def csv_header(fields=None):
+    buf = io.StringIO()
+    csv.writer(buf).writerow(fields or Character.field_paths())
+    return buf.getvalue()
+
+def format_batches(path, fmt, fields=None, stats=None):
+    """yields (count, output) for each BATCH_SIZE characters of one file,
+    with 'output' their encoded text"""
+    #the compiled decoders are quicker but skip the per type statistics
+    pool = CharacterPool(path, compiled=stats is None, stats=stats)
+    #details shows every field so only the other formats can project
+    projection = fields if fmt != 'details' else None
+    chars = pool.characters(fields=projection)
+    while True:
+        batch = list(islice(chars, BATCH_SIZE))
+        if not batch:
+            return
+        yield (len(batch), format_characters(batch, fmt, fields).encode('utf-8'))
+
+def process_file(path, out, fmt, fields=None, stats=False):
+    """read and format one file to binary file 'out' a batch at a time,
+    returning a FileResult. This is what runs on each worker"""
+    stats = ParseStats() if stats else None
+    count = 0
+    batches = format_batches(path, fmt, fields, stats)
+    while True:
+        #only errors reading the file belong to it, failing to write the
+        #output is everyone's problem
+        try:
+            batch = next(batches, None)
+        except Exception as e:
+            return FileResult(path, count, e, stats)
+        if batch is None:
+            return FileResult(path, count, None, stats)
+        out.write(batch[1])
+        count += batch[0]
+
+def validate_file(path, out, fmt, strict=False):
+    """validate one file, writing its report to 'out' and returning a
+    FileResult with an error if it isn't valid"""
+    try:
+        report = CharacterPool(path).validate(strict)
+    except Exception as e:
+        return FileResult(path, 0, e, None)
+
+    if fmt == 'jsonl':
+        output = json.dumps(report.to_dict()) + '\n'
+    else:
+        output = str(report) + '\n'
+    out.write(output.encode('utf-8'))
+    error = None
+    if not report.valid:
+        count = len(report.problems)
+        error = XCFParseError("Invalid pool, {} problem{}".format(count, 's' if count > 1 else ''))
+    return FileResult(path, report.records, error, None)
+
+def spool(worker, path):
+    """run worker(path, out) with 'out' a new temporary file, returns the
+    FileResult and the temporary file's name"""
+    fd, spooled = tempfile.mkstemp(suffix='.out')
+    try:
+        with open(fd, 'wb') as f:
+            return (worker(path, f), spooled)
+    except BaseException:
+        os.unlink(spooled)
+        raise
+
+def process_files(paths, worker, out, workers=1):
+    """runs worker(path, out) for each of 'paths' in order, yielding the
+    FileResult of each. With more than one worker up to 'workers' run at once
+    in separate processes, each writing to a temporary file which is copied
+    to 'out' in order"""
+    if workers == 1:
+        for path in paths:
+            yield worker(path, out)
+        return
+
+    from .scan import make_executor
+    queue = deque()
+
+    def finish(future):
+        result, spooled = future.result()
+        try:
+            with open(spooled, 'rb') as f:
+                shutil.copyfileobj(f, out, OUTPUT_BUFFER)
+        finally:
+            os.unlink(spooled)
+        return result
+
+    try:
+        with make_executor('process', workers) as pool:
+            #enough files queued up that workers always have the next one ready
+            window = 2 * (workers or os.cpu_count() or 1)
+            for path in paths:
+                if path == '-':
+                    #only this process has our stdin
+                    future = Future()
+                    future.set_result(spool(worker, path))
+                else:
+                    future = pool.submit(spool, worker, path)
+                queue.append(future)
+                if len(queue) >= window:
+                    yield finish(queue.popleft())
+            while queue:
+                yield finish(queue.popleft())
+    finally:
+        #anything left over from stopping early
+        for future in queue:
+            if not future.cancel() and future.exception() is None:
+                os.unlink(future.result()[1])
+
+def open_output():
+    """returns a binary writer for stdout with a large buffer"""
+    sys.stdout.flush()
+    try:
+        return open(sys.stdout.fileno(), 'wb', buffering=OUTPUT_BUFFER, closefd=False)
+    except (AttributeError, OSError, ValueError):
+        #not a real file, such as when captured
+        return sys.stdout.buffer
+
+def main(argv=None, out=None):
+    """run the command line tool, returns the exit status. Output goes to
+    'out', a binary file, rather than stdout if given"""
+    parser = argparse.ArgumentParser(prog='xcfp.py',
+                                     description="Print the characters in character pool files")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help="pool file, '-' for stdin, directory or glob")
+    parser.add_argument('-f', '--format', choices=FORMATS, default='details',
+                        help="output format, default details")
+    parser.add_argument('--fields', type=lambda value: value.split(','),
+                        help="comma separated attribute names to output, e.g. "
+                             "firstName,appearance.gender")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="files to process at once, 0 for one per CPU")
+    parser.add_argument('--stats', action='store_true',
+                        help="print a breakdown of where parsing time went to stderr")
+    parser.add_argument('--validate', action='store_true',
+                        help="check each file's structure and report any problems instead")
+    parser.add_argument('--strict', action='store_true',
+                        help="with --validate also check each value's layout and for trailing data")
+    args = parser.parse_args(argv)
+
+    if args.fields is not None:
+        try:
+            Character.projection(args.fields)
+        except KeyError as e:
+            parser.error(e.args[0])
+        #whole structs have no single value to print
+        paths = Character.field_paths()
+        for field in args.fields:
+            if field not in paths:
+                parser.error("{} is a struct, give the fields of it to output instead, e.g. {}"
+                             .format(field, next(path for path in paths if path.startswith(field + '.'))))
+    if args.workers < 0:
+        parser.error("--workers can't be negative")
+    if args.validate and args.format == 'csv':
+        parser.error("--validate reports are details or jsonl")
+
+    if args.validate:
+        worker = partial(validate_file, fmt=args.format, strict=args.strict)
+    else:
+        worker = partial(process_file, fmt=args.format, fields=args.fields, stats=args.stats)
+
+    stats = ParseStats() if args.stats else None
+    owned = out is None
+    if owned:
+        out = open_output()
+
+    files = failed = 0
+    try:
+        if args.format == 'csv' and not args.validate:
+            out.write(csv_header(args.fields).encode('utf-8'))
+
+        for result in process_files(expand_paths(args.paths), worker, out, args.workers or None):
+            files += 1
+            if result.error is not None:
+                failed += 1
+                print("{}: {}".format(result.path, result.error), file=sys.stderr)
+            if stats is not None and result.stats is not None:
+                stats.update(result.stats)
+        out.flush()
+    except BrokenPipeError:
+        #the reader went away, e.g. piped into head. Point stdout at devnull
+        #so flushing it on the way out doesn't fail too
+        if owned:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if owned and out is not sys.stdout.buffer:
+            try:
+                out.close()
+            except BrokenPipeError:
+                pass
+
+    if stats is not None:
+        print(stats.format(), file=sys.stderr)
+    if failed:
+        print("{} of {} files failed".format(failed, files), file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,134 @@
+from array import array
+from collections import namedtuple, OrderedDict
+
+from .character import Character
+from .properties.atomic import IntProperty, BoolProperty
+from .property_set import PropertySet
+from .table import field_property
+
+EncodedColumn = namedtuple('EncodedColumn', ('codes', 'categories'))
+EncodedColumn.__doc__ = """A dictionary encoded Name/Str column, 'codes' is an
+int32 array of indexes into the 'categories' list of distinct values"""
+
+class ColumnBuilder():
+    """Accumulates the values of one field. Int and Bool values go into
+    arrays, Name/Str values are dictionary encoded unless 'blob' is set, in
+    which case they are concatenated into a single blob with an array of
+    offsets into it"""
+
+    def __init__(self, desc, blob=False):
+        self.default = desc._get()
+        self.values = array('i')
+        if isinstance(desc, BoolProperty):
+            self.kind = 'bool'
+            self.values = array('b')
+        elif isinstance(desc, IntProperty):
+            self.kind = 'int32'
+        elif blob:
+            self.kind = 'blob'
+            self.values = array('q', [0])
+            self.blob = bytearray()
+        else:
+            self.kind = 'dict'
+            self.codes = {}
+            self.categories = []
+
+    def append(self, value):
+        kind = self.kind
+        if kind == 'dict':
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.categories)
+                self.categories.append(value)
+            value = code
+        elif kind == 'blob':
+            self.blob += value.encode('latin_1')
+            value = len(self.blob)
+        self.values.append(value)
+
+    def __len__(self):
+        if self.kind == 'blob':
+            return len(self.values) - 1
+        return len(self.values)
+
+    def finish(self, np):
+        if self.kind == 'dict':
+            codes = np.frombuffer(self.values, dtype=np.int32)
+            return EncodedColumn(codes, self.categories)
+        if self.kind == 'blob':
+            raise TypeError("Blob columns can't be exported to NumPy")
+        return np.frombuffer(self.values, dtype=self.kind)
+
+def read_columns(pool, fields, blob_types=()):
+    """read 'fields' of every character in 'pool' into a ColumnBuilder each,
+    straight off the property framing without building any Characters or
+    Properties. Fields whose Property is one of 'blob_types' are built as
+    blob columns"""
+    builders = []
+    targets = {}
+    for path in fields:
+        desc = field_property(Character, path)
+        if isinstance(desc, PropertySet):
+            raise KeyError("Can't store a whole PropertySet as a column: {}".format(path))
+
+        #map the property names along the path to the builder's position
+        cls = Character
+        target = targets
+        attrs = path.split('.')
+        for attr in attrs[:-1]:
+            name = cls.field_names[attr]
+            cls = type(getattr(cls, attr))
+            target = target.setdefault(name, {})
+        target[cls.field_names[attrs[-1]]] = len(builders)
+        builders.append(ColumnBuilder(desc, isinstance(desc, blob_types)))
+
+    defaults = [builder.default for builder in builders]
+    with pool.parser() as parser:
+        count = parser.read_header()
+        for _ in range(count):
+            row = list(defaults)
+            _fill_row(parser, targets, row)
+            for builder, value in zip(builders, row):
+                builder.append(value)
+
+    return builders
+
+def to_columns(pool, fields=None):
+    """returns an OrderedDict of dotted field path to NumPy array for every
+    character in 'pool'. Int fields become int32 arrays, Bool fields bool
+    arrays and Name/Str fields EncodedColumns.
+
+    Values are read straight off the property framing into the columns without
+    building any Characters or Properties, and properties outside 'fields'
+    (default all of them) are skipped without being decoded"""
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("to_columns() needs NumPy installed")
+
+    if fields is None:
+        fields = Character.field_paths()
+
+    builders = read_columns(pool, fields)
+    return OrderedDict((path, builder.finish(np)) for path, builder in zip(fields, builders))
+
+def _fill_row(parser, targets, row):
+    while True:
+        frame = parser.read_frame()
+        if frame is None:
+            return
+        name, proptype, size = frame
+
+        target = targets.get(name)
+        if target is None:
+            parser.skip(size)
+            continue
+
+        value = parser.unpack(proptype, parser.read(size))
+        if isinstance(target, dict):
+            #structs come back as a parser over their payload
+            _fill_row(value, target, row)
+        else:
+            if isinstance(value, tuple):
+                value = value[0]
+            row[target] = value
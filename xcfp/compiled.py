@@ -0,0 +1,167 @@
+"""Decoders specialised to the declared fields of a PropertySet.
+
+A CompiledDecoder precomputes the exact bytes of each declared property's
+name/type framing, in declaration order, and checks the buffer against them
+directly instead of reading and looking up each string. Values are unpacked
+straight from the buffer and the Property objects are built without going
+through Property.__new__ or the _set type checks.
+
+Any property that doesn't match what the schema expects next (an unknown or
+out of order property, an unexpected size) is read by the parser's generic
+read_property() instead, after which decoding carries on from the next
+declared field. Parsers other than a BufferParser, or with a field projection,
+always use the generic path."""
+
+from .parser import BufferParser, INT
+from .properties import PropertyType, SIZE, PAD, END, pack_str
+from .properties.atomic import NameProperty, StrProperty
+from .properties.struct import StructProperty
+from .property_set import PropertySet
+
+# value kinds
+INT_VALUE, BOOL_VALUE, STR_VALUE, NAME_VALUE, STRUCT_VALUE = range(5)
+
+class FieldSpec():
+    """Precomputed decoding information for one declared property"""
+
+    def __init__(self, name, typename):
+        self.name = name
+        self.cls = PropertyType(typename)
+
+        if issubclass(self.cls, StructProperty):
+            self.kind = STRUCT_VALUE
+            file_typename = 'StructProperty'
+            #struct properties have the struct's name after the size
+            self.suffix = pack_str(typename) + PAD
+            self.decoder = decoder_for(self.cls)
+        else:
+            file_typename = typename
+            self.suffix = b''
+            self.kind = {
+                'IntProperty': INT_VALUE,
+                'ArrayProperty': INT_VALUE,
+                'BoolProperty': BOOL_VALUE,
+                'StrProperty': STR_VALUE,
+                'NameProperty': NAME_VALUE,
+            }.get(file_typename)
+            if self.kind is None:
+                raise TypeError("Can't compile a decoder for PropertyType: {}".format(typename))
+
+        self.typename = typename
+        self.prefix = pack_str(name) + PAD + pack_str(file_typename) + PAD
+
+class CompiledDecoder():
+    """Decodes a property block for a particular PropertySet subclass, pass it
+    as a Parser's 'decoder' to use it in Parser.properties()"""
+
+    def __init__(self, property_set_cls):
+        self.property_set_cls = property_set_cls
+        self.specs = []
+        for attr, name in property_set_cls.field_names.items():
+            typename = getattr(property_set_cls, attr).typename
+            self.specs.append(FieldSpec(name, typename))
+        self.positions = {spec.name: i for i, spec in enumerate(self.specs)}
+
+    def __call__(self, parser):
+        if parser.fields is not None:
+            return parser._read_projected()
+        if not isinstance(parser, BufferParser):
+            return parser._read_properties()
+
+        buf = parser.buffer
+        specs = self.specs
+        count = len(specs)
+        pos = parser.pos
+        i = 0
+        props = []
+
+        while True:
+            if i < count:
+                spec = specs[i]
+                prefix = spec.prefix
+                start = pos + len(prefix)
+                if buf[pos:start] == prefix:
+                    prop = self.read_value(parser, spec, start)
+                    if prop is not None:
+                        props.append(prop)
+                        pos = parser.pos
+                        i += 1
+                        continue
+
+            if buf[pos:pos + len(END)] == END:
+                parser.pos = pos + len(END)
+                return props
+
+            #not what we expected, let the generic reader deal with it and
+            #carry on from wherever it was in the schema
+            parser.pos = pos
+            prop = parser.read_property()
+            if prop is None:
+                return props
+            props.append(prop)
+            pos = parser.pos
+            i = self.positions.get(prop.name, i - 1) + 1
+
+    def read_value(self, parser, spec, pos):
+        """decode the value of a property whose framing matched 'spec' up to
+        the size. Returns None if the rest doesn't match"""
+        buf = parser.buffer
+        if pos + 8 > len(buf):
+            return None
+        size, pad = SIZE.unpack_from(buf, pos)
+        pos += 8
+        if pad != 0 or size < 0 or pos + size + len(spec.suffix) > len(buf):
+            return None
+
+        kind = spec.kind
+        if kind == INT_VALUE:
+            if size != 4:
+                return None
+            value = INT.unpack_from(buf, pos)[0]
+        elif kind == BOOL_VALUE:
+            #BoolProperty gives its size as 0 but has a single byte value
+            if size != 0 or pos >= len(buf):
+                return None
+            size = 1
+            value = buf[pos] != 0
+        elif kind == STR_VALUE:
+            if parser.intern is None:
+                value = StrProperty.unpack(buf[pos:pos + size])
+            else:
+                value = parser.intern.unpack(StrProperty, buf[pos:pos + size])
+        elif kind == NAME_VALUE:
+            if parser.intern is None:
+                value = NameProperty.unpack(buf[pos:pos + size])
+            else:
+                value = parser.intern.unpack(NameProperty, buf[pos:pos + size])
+        else:
+            #structs stay undecoded until used, with this module's decoder for
+            #their own fields
+            suffix = spec.suffix
+            if buf[pos:pos + len(suffix)] != suffix:
+                return None
+            pos += len(suffix)
+            nested = BufferParser(buf[pos:pos + size], None, spec.decoder, parser.intern, parser.types)
+            prop = spec.cls(spec.name, spec.typename, nested)
+            parser.pos = pos + size
+            return prop
+
+        prop = object.__new__(spec.cls)
+        prop.name = spec.name
+        if kind == NAME_VALUE:
+            (value, prop.param) = value
+        prop.value = value
+        parser.pos = pos + size
+        return prop
+
+_decoders = {}
+
+def decoder_for(property_set_cls):
+    """returns the (cached) CompiledDecoder for a PropertySet subclass"""
+    if not issubclass(property_set_cls, PropertySet):
+        raise TypeError("Not a PropertySet: {}".format(property_set_cls.__name__))
+
+    decoder = _decoders.get(property_set_cls)
+    if decoder is None:
+        decoder = _decoders[property_set_cls] = CompiledDecoder(property_set_cls)
+    return decoder
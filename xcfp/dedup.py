@@ -0,0 +1,164 @@
+"""Finding duplicate characters across many pools.
+
+Characters are compared by a hash of their raw record bytes, so nothing has
+to be decoded. Two characters hash the same when they have the same
+properties with the same values in the same order, optionally leaving out
+properties that change on every export such as the PoolTimestamp.
+
+dedup() hashes every record of every file into fixed size entries, sorts
+them in runs of a bounded size spilled to temporary files and merges the runs
+to find the hashes that repeat, so memory use doesn't grow with the size of
+the corpus"""
+
+import heapq
+import os
+import tempfile
+from collections import namedtuple
+from hashlib import blake2b
+from itertools import groupby
+from struct import Struct
+
+from .character import Character
+from .parser import BufferParser
+from .pool import CharacterPool
+
+DIGEST_SIZE = 16
+
+#hash, file number, character index, byte offset. Big endian so the packed
+#entries sort in the same order as their values
+ENTRY = Struct('>{}sIIQ'.format(DIGEST_SIZE))
+
+#entries sorted in memory at once before being spilled to a temporary file
+RUN_SIZE = 1 << 18
+
+Ref = namedtuple('Ref', ('path', 'index', 'offset'))
+Ref.__doc__ = """A character record, the 'index'th in file 'path' starting
+at byte 'offset'. 'path' is the position in dedup()'s paths for a pool that
+isn't of a named file"""
+
+DuplicateGroup = namedtuple('DuplicateGroup', ('hash', 'refs'))
+DuplicateGroup.__doc__ = """Characters with the same content hash, 'refs' is
+a list of their Refs in the order of the paths they were found in"""
+
+def property_names(ignore, cls=Character):
+    """converts attribute names, e.g. ['timestamp'], to a set of the property
+    names they're stored under"""
+    names = set()
+    for attr in ignore:
+        if attr not in cls.field_names:
+            raise KeyError("Unknown field for {}: {}".format(cls.__name__, attr))
+        names.add(cls.field_names[attr])
+    return frozenset(names)
+
+def record_hash(record, ignore=frozenset()):
+    """returns the hash digest of the raw bytes of a character record,
+    leaving out any top level properties whose names are in 'ignore'"""
+    digest = blake2b(digest_size=DIGEST_SIZE)
+    if not ignore:
+        digest.update(record)
+        return digest.digest()
+
+    with BufferParser(record) as parser:
+        buf = parser.buffer
+        start = 0
+        while True:
+            pos = parser.pos
+            frame = parser.read_frame()
+            if frame is None:
+                break
+            name, _, size = frame
+            parser.skip(size)
+            if name in ignore:
+                digest.update(buf[start:pos])
+                start = parser.pos
+        digest.update(buf[start:])
+    return digest.digest()
+
+def record_spans(pool):
+    """yields (index, offset, record) for each character record of 'pool',
+    with 'record' the raw bytes of it, without decoding anything"""
+    with pool.parser() as parser:
+        count = parser.read_header()
+        for index in range(count):
+            offset = parser.tell()
+            yield (index, offset, parser.read_raw_properties())
+
+def _sorted_runs(entries, run_size, tmp):
+    """sorts 'entries' in runs of 'run_size' and returns an iterator over
+    each run. Runs after the first are written out to files in 'tmp'"""
+    runs = []
+    run = []
+    for entry in entries:
+        run.append(entry)
+        if len(run) >= run_size:
+            run.sort()
+            fname = os.path.join(tmp, 'run{}'.format(len(runs)))
+            with open(fname, 'wb') as f:
+                f.write(b''.join(run))
+            runs.append(fname)
+            run = []
+    run.sort()
+
+    if not runs:
+        return [iter(run)]
+    return [_read_run(fname) for fname in runs] + [iter(run)]
+
+def _read_run(fname):
+    size = ENTRY.size
+    with open(fname, 'rb') as f:
+        while True:
+            entry = f.read(size)
+            if not entry:
+                return
+            yield entry
+
+def dedup(paths, ignore=(), errors=None, run_size=RUN_SIZE):
+    """yields a DuplicateGroup for each set of characters with the same
+    content across the pools in 'paths' (file names or CharacterPools), see
+    Character.content_hash(). 'ignore' is attribute names of properties to
+    leave out of the comparison, e.g. ['timestamp'].
+
+    If 'errors' is a list, (path, exception) is added to it for any file
+    that can't be read and the rest are carried on with, otherwise the
+    exception is raised. A file that fails partway is left out completely,
+    so each file's entries are held until it has been read. Otherwise only
+    'run_size' hash entries are held in memory at once, the rest go through
+    temporary files.
+
+    Refs name CharacterPools that aren't of a named file, such as ones of an
+    in-memory buffer, by their position in 'paths' instead"""
+    ignore = property_names(ignore)
+    names = []
+
+    def file_entries(pool, number):
+        for index, offset, record in record_spans(pool):
+            yield ENTRY.pack(record_hash(record, ignore), number, index, offset)
+
+    def entries():
+        for path in paths:
+            number = len(names)
+            if isinstance(path, CharacterPool):
+                names.append(path.fname if isinstance(path.fname, str) else number)
+                pool = path
+            else:
+                names.append(path)
+                pool = CharacterPool(path)
+
+            if errors is None:
+                yield from file_entries(pool, number)
+                continue
+            try:
+                read = list(file_entries(pool, number))
+            except Exception as e:
+                errors.append((names[number], e))
+                continue
+            yield from read
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = _sorted_runs(entries(), run_size, tmp)
+        unpacked = map(ENTRY.unpack, heapq.merge(*runs))
+        for digest, group in groupby(unpacked, key=lambda entry: entry[0]):
+            group = list(group)
+            if len(group) > 1:
+                yield DuplicateGroup(digest.hex(), [Ref(names[number], index, offset)
+                                                    for _, number, index, offset in group])
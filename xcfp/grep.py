@@ -0,0 +1,103 @@
+import re
+from bisect import bisect_right
+from operator import attrgetter
+
+from .character import Character
+from .parser import BufferParser
+from .pool import read_character
+from .properties.atomic import NameProperty, StrProperty
+from .table import field_property
+
+def text_fields(cls=Character):
+    """returns the dotted paths of all the Name and Str fields of 'cls'"""
+    return [path for path in cls.field_paths()
+            if isinstance(field_property(cls, path), (NameProperty, StrProperty))]
+
+#bytes regexes only know ASCII, so these can accept latin-1 text the search
+#over the raw file wouldn't: classes like \w and case insensitive matching
+UNICODE_CLASS = re.compile(r'(?<!\\)(?:\\\\)*\\[wWbBdDsS]')
+SCOPED_IGNORECASE = re.compile(r'\(\?[aiLmsux]*-?[aiLmsux]*i[aiLmsux]*:')
+
+def compile_pattern(pattern):
+    """returns (bytes regex, str regex) for a literal str or a compiled
+    pattern, strings are matched as latin-1 as they are in the files. The
+    bytes regex is None if the pattern can't be run over the raw file or
+    might miss text there the str regex matches, and None is returned in
+    place of both for a literal that can never match"""
+    if isinstance(pattern, str):
+        source = re.escape(pattern)
+        flags = 0
+    else:
+        source = pattern.pattern
+        flags = pattern.flags & ~re.UNICODE
+        if isinstance(source, bytes):
+            source = source.decode('latin_1')
+            #keep the ASCII only meaning it had as a bytes pattern
+            flags |= re.ASCII
+
+    str_regex = re.compile(source, flags)
+    if not flags & re.ASCII and (flags & re.IGNORECASE or UNICODE_CLASS.search(source)
+                                 or SCOPED_IGNORECASE.search(source)):
+        return (None, str_regex)
+    try:
+        encoded = source.encode('latin_1')
+    except UnicodeEncodeError:
+        #nothing outside latin-1 can be in the file
+        if isinstance(pattern, str):
+            return None
+        return (None, str_regex)
+    return (re.compile(encoded, flags), str_regex)
+
+def grep(pool, pattern, fields=None):
+    """yields (index, Character) for the characters in 'pool' with a 'fields'
+    value (dotted paths, default every Name/Str field) matching 'pattern',
+    either a literal string or a compiled regular expression.
+
+    The pattern is first run over the raw bytes of the file, and only records
+    containing a match are decoded and checked properly. A file without any
+    match is never parsed at all. As regular expressions are run over the raw
+    file they shouldn't rely on anchors like ^ and $"""
+    compiled = compile_pattern(pattern)
+    if compiled is None:
+        return
+    byte_regex, str_regex = compiled
+    if fields is None:
+        fields = text_fields()
+    getters = [attrgetter(path) for path in fields]
+
+    source = pool.fname
+    if not isinstance(source, (str, bytes, bytearray, memoryview)) or source == '-':
+        raise ValueError("grep needs a file name or buffer, not {!r}".format(source))
+
+    with BufferParser(source, intern=pool.intern) as parser:
+        buf = parser.buffer
+
+        if byte_regex is None:
+            #every record has to be decoded and checked
+            for index, (start, _) in enumerate(pool.offsets()):
+                parser.seek(start)
+                char = read_character(parser)
+                if any(str_regex.search(getter(char)) for getter in getters):
+                    yield (index, char)
+            return
+
+        match = byte_regex.search(buf)
+        if match is None:
+            return
+
+        offsets = pool.offsets()
+        starts = [start for start, _ in offsets]
+        while match is not None:
+            index = bisect_right(starts, match.start()) - 1
+            if index < 0 or match.start() >= offsets[index][1]:
+                #matched in the header
+                match = byte_regex.search(buf, max(match.end(), match.start() + 1))
+                continue
+
+            start, end = offsets[index]
+            parser.seek(start)
+            char = read_character(parser)
+            if any(str_regex.search(getter(char)) for getter in getters):
+                yield (index, char)
+
+            match = byte_regex.search(buf, end)
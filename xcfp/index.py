@@ -0,0 +1,174 @@
+from bisect import bisect_left
+from collections import namedtuple
+from operator import attrgetter
+
+from .character import Character
+from .pool import CharacterPool, read_character
+
+class RecordHandle(namedtuple('RecordHandle', ('file', 'start', 'end'))):
+    """A reference to one character record, by the file it's in and its byte
+    offsets in that file"""
+
+    __slots__ = ()
+
+    def character(self):
+        """decode the record into a Character"""
+        with CharacterPool(self.file).parser() as parser:
+            parser.seek(self.start)
+            return read_character(parser)
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class PoolIndex():
+    """In memory secondary indexes over the characters of many pools.
+
+    'fields' (dotted Character attribute names) get exact match hash indexes
+    for where(), 'text_fields' get case insensitive trigram and prefix indexes
+    for search(). Lookups return RecordHandles which decode to Characters on
+    demand. Files can be added and removed at any time"""
+
+    def __init__(self, fields=('country', 'soldierClass', 'characterTemplate', 'appearance.gender'),
+                 text_fields=('firstName', 'lastName', 'nickName')):
+        self.fields = tuple(fields)
+        self.text_fields = tuple(text_fields)
+        self.projection = Character.projection(self.fields + self.text_fields)
+
+        self.records = {}
+        self.values = {}
+        self.texts = {}
+        self.files = {}
+        self.hashes = {field: {} for field in self.fields}
+        self.grams = {field: {} for field in self.text_fields}
+        self._sorted = {}
+        self._next_id = 0
+
+    def add(self, pool):
+        """index every character in 'pool' (a CharacterPool or file name),
+        replacing anything already indexed for the same file"""
+        if not isinstance(pool, CharacterPool):
+            pool = CharacterPool(pool)
+        if pool.fname in self.files:
+            self.remove(pool.fname)
+
+        ids = self.files[pool.fname] = []
+        with pool.parser(self.projection) as parser:
+            count = parser.read_header()
+            for _ in range(count):
+                start = parser.tell()
+                char = Character(parser.properties())
+                ids.append(self._add_record(RecordHandle(pool.fname, start, parser.tell()), char))
+        self._sorted.clear()
+
+    def _add_record(self, handle, char):
+        record_id = self._next_id
+        self._next_id += 1
+        self.records[record_id] = handle
+
+        values = tuple(attrgetter(field)(char) for field in self.fields)
+        self.values[record_id] = values
+        for field, value in zip(self.fields, values):
+            self.hashes[field].setdefault(value, set()).add(record_id)
+
+        texts = tuple(attrgetter(field)(char).lower() for field in self.text_fields)
+        self.texts[record_id] = texts
+        for field, text in zip(self.text_fields, texts):
+            grams = self.grams[field]
+            for gram in trigrams(text):
+                grams.setdefault(gram, set()).add(record_id)
+
+        return record_id
+
+    def remove(self, fname):
+        """drop all the characters indexed from file 'fname'"""
+        for record_id in self.files.pop(fname):
+            del self.records[record_id]
+
+            for field, value in zip(self.fields, self.values.pop(record_id)):
+                _discard(self.hashes[field], value, record_id)
+
+            for field, text in zip(self.text_fields, self.texts.pop(record_id)):
+                grams = self.grams[field]
+                for gram in trigrams(text):
+                    _discard(grams, gram, record_id)
+        self._sorted.clear()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, fname):
+        return fname in self.files
+
+    def where(self, criteria=None, **kwargs):
+        """returns handles of the characters whose fields equal all the given
+        values, sorted by file and offset. Nested fields can be given as a dict
+        or with '__' in place of '.', e.g. where(appearance__gender=1)"""
+        criteria = dict(criteria or {})
+        criteria.update((name.replace('__', '.'), value) for name, value in kwargs.items())
+
+        sets = []
+        for field, value in criteria.items():
+            if field not in self.hashes:
+                raise KeyError("Field isn't indexed: {}".format(field))
+            sets.append(self.hashes[field].get(value, set()))
+
+        if not sets:
+            return self._handles(self.records)
+        sets.sort(key=len)
+        return self._handles(sets[0].intersection(*sets[1:]))
+
+    def search(self, name=None, prefix=False, **terms):
+        """returns handles of the characters with text fields containing the
+        given text, case insensitively. 'name' searches every text field,
+        otherwise give terms for individual fields, e.g. search(lastName='smi').
+        With 'prefix' set the fields must start with the text instead"""
+        if name is not None:
+            matches = set()
+            for field in self.text_fields:
+                matches |= self._search(field, name.lower(), prefix)
+            return self._handles(matches)
+
+        sets = []
+        for field, text in terms.items():
+            if field not in self.grams:
+                raise KeyError("Field isn't text indexed: {}".format(field))
+            sets.append(self._search(field, text.lower(), prefix))
+
+        if not sets:
+            return self._handles(self.records)
+        return self._handles(set.intersection(*sets))
+
+    def _search(self, field, text, prefix):
+        position = self.text_fields.index(field)
+
+        if prefix:
+            keys = self._sorted.get(field)
+            if keys is None:
+                keys = sorted((texts[position], record_id) for record_id, texts in self.texts.items())
+                self._sorted[field] = keys
+            matches = set()
+            for i in range(bisect_left(keys, (text,)), len(keys)):
+                value, record_id = keys[i]
+                if not value.startswith(text):
+                    break
+                matches.add(record_id)
+            return matches
+
+        grams = trigrams(text)
+        if grams:
+            sets = sorted((self.grams[field].get(gram, set()) for gram in grams), key=len)
+            candidates = sets[0].intersection(*sets[1:])
+        else:
+            #too short for trigrams so check everything
+            candidates = self.texts
+        return {record_id for record_id in candidates if text in self.texts[record_id][position]}
+
+    def _handles(self, ids):
+        return sorted(self.records[record_id] for record_id in ids)
+
+def _discard(index, key, record_id):
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(record_id)
+        if not ids:
+            del index[key]
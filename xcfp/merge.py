@@ -0,0 +1,63 @@
+from contextlib import ExitStack
+from operator import attrgetter
+
+from .pool import CharacterPool
+from .writer import PoolWriter
+
+def _pools(sources):
+    return [source if isinstance(source, CharacterPool) else CharacterPool(source)
+            for source in sources]
+
+def merge(sources, dest, select=None, fields=None, pool_name=None):
+    """write the characters of every pool in 'sources' (CharacterPools or
+    file names) to a new pool 'dest', see PoolWriter. Returns the number of
+    characters written.
+
+    'select' is an optional function taking a Character and returning whether
+    to keep it, the Characters only have 'fields' (attribute names, default all
+    of them) decoded. Records are copied across as they are, one at a time, so
+    only the header is built anew"""
+    pools = _pools(sources)
+    decode = fields if select is not None else []
+
+    with PoolWriter(dest, pool_name) as writer:
+        if writer.file.seekable():
+            writer.write_header()
+        else:
+            #a stream can't have the count filled in afterwards so count first
+            writer.write_header(sum(1 for pool in pools for _, char in pool.records(decode)
+                                    if select is None or select(char)))
+
+        for pool in pools:
+            for record, char in pool.records(decode):
+                if select is None or select(char):
+                    writer.write_record(record)
+        return writer.written
+
+def split(pool, key, dest, fields=None):
+    """write the characters of 'pool' to a new pool for each distinct value
+    of key(Character). 'key' can also be a (dotted) attribute name, in which
+    case 'fields' defaults to just that attribute. 'dest' is a format string
+    for the file names, e.g. 'pools/{}.bin'.
+
+    Returns a dict of key to file name. Records are copied across as they are,
+    so only their 'fields' (default all of them) are decoded"""
+    if isinstance(pool, str):
+        pool = CharacterPool(pool)
+    if isinstance(key, str):
+        if fields is None:
+            fields = [key]
+        key = attrgetter(key)
+
+    fnames = {}
+    with ExitStack() as stack:
+        writers = {}
+        for record, char in pool.records(fields):
+            value = key(char)
+            writer = writers.get(value)
+            if writer is None:
+                fname = fnames[value] = dest.format(value)
+                writer = writers[value] = stack.enter_context(PoolWriter(fname))
+                writer.write_header()
+            writer.write_record(record)
+    return fnames
@@ -1,17 +1,131 @@
 #/usr/bin/python3
 import struct
 import io
-from .properties import PropertyType, Property
+import mmap
+from sys import intern
+from time import perf_counter
+from .properties import PropertyType
+
+# precompiled so the hot read paths don't have to look up the format each time
+INT = struct.Struct('<i')
+
+# how much a StreamParser reads ahead at a time
+BLOCK_SIZE = 1 << 16
 
 class XCFParseError(Exception):
     pass
 
+class RecordingReader():
+    """Wraps a file keeping a copy of everything read through it, it can't
+    seek so skipped data gets read (and kept) too"""
+
+    def __init__(self, file):
+        self.file = file
+        self.data = bytearray()
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.data += data
+        return data
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation("RecordingReader can't seek")
+
+class CountingReader():
+    """Wraps a file reporting each read through it to a ParseStats"""
+
+    def __init__(self, file, stats):
+        self.file = file
+        self.stats = stats
+
+    def read(self, size=-1):
+        start = perf_counter()
+        data = self.file.read(size)
+        self.stats.on_read(len(data), perf_counter() - start)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+class InternTable():
+    """Shares decoded values between identical encoded Name/Str properties.
+
+    Each distinct encoding is only decoded once and every property with the
+    same bytes gets the same value object. Values longer than max_length bytes
+    (biographies and the like) are rarely repeated so aren't kept. Each type
+    holds at most max_entries values, once it's full it is emptied and starts
+    again, so a long running process seeing many unique values (timestamps,
+    names) doesn't keep them all forever.
+
+    Tables can be shared between threads, each update is a single dict
+    operation so concurrent lookups at worst decode a value twice"""
+
+    def __init__(self, max_length=64, max_entries=1 << 16):
+        self.max_length = max_length
+        self.max_entries = max_entries
+        self.tables = {}
+
+    def unpack(self, proptype, data):
+        if len(data) > self.max_length:
+            return proptype.unpack(data)
+
+        table = self.tables.get(proptype)
+        if table is None:
+            table = self.tables.setdefault(proptype, {})
+
+        try:
+            return table[data]
+        except KeyError:
+            pass
+        except ValueError:
+            #views of writable buffers can't be hashed
+            data = bytes(data)
+            if data in table:
+                return table[data]
+
+        if len(table) >= self.max_entries:
+            table = self.tables[proptype] = {}
+        return table.setdefault(bytes(data), proptype.unpack(data))
+
+    def __len__(self):
+        return sum(map(len, self.tables.values()))
+
+#process wide table for sharing values between pools
+SHARED_INTERN = InternTable()
+
 class Parser():
     """Class that does all the actual work of parsing a character file,
     implements the ContextManager interface to take control of the actual file
-    and ensure it is closed even on error"""
-
-    def __init__(self, f):
+    and ensure it is closed even on error.
+
+    'fields' optionally restricts properties() to a projection of the
+    properties in each block, given as a dict of property names to either None
+    (decode the whole value) or a nested projection for a struct. Properties
+    not in the projection are skipped over without being decoded.
+
+    'decoder' optionally replaces the generic loop in properties() with a
+    callable taking the parser and returning the block's properties, such as
+    the schema specific decoders from xcfp.compiled.
+
+    'intern' is an optional InternTable used to share repeated Name and Str
+    values.
+
+    'types' maps type names to Property classes, by default the snapshot of
+    registered types from when the parser was created. A parser only changes
+    its own state while decoding, so separate parsers can be used from
+    separate threads.
+
+    'stats' is an optional xcfp.stats.ParseStats to collect statistics on
+    the parse in"""
+
+    def __init__(self, f, fields=None, decoder=None, intern=None, types=None, stats=None):
+        self.fields = fields
+        self.decoder = decoder
+        self.intern = intern
+        self.types = PropertyType.registry() if types is None else types
+        self.stats = None
+        if stats is not None:
+            stats.attach(self)
         if isinstance(f, str):
             self.fname = f
         else:
@@ -24,17 +138,22 @@ class Parser():
         #if 'fname' is None it means we were passed an open file
         #and don't need to open a new one
         if self.fname is None:
-            return self
-
+            pass
         #special case, if fname is '-' use stdin instead
-        if self.fname == '-':
+        elif self.fname == '-':
             from sys import stdin
             self.file = stdin.buffer
         else:
             self.file = open(self.fname, 'rb')
+
+        if self.stats is not None and not isinstance(self.file, CountingReader):
+            self.file = CountingReader(self.file, self.stats)
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
+        if isinstance(self.file, CountingReader):
+            self.file = self.file.file
+
         #don't actually close stdin if we're reading from that as we can't open
         #it again
         from sys import stdin
@@ -45,21 +164,46 @@ class Parser():
         """Returns an iterator over a property block in the file. Assumes the
         file is at a valid point to read properties, if you've just opened the
         file you may need to read_header() first"""
+        if self.decoder is not None:
+            return iter(self.decoder(self))
+        if self.fields is None:
+            return self._read_properties()
+        return self._read_projected()
 
+    def _read_properties(self):
         while True:
             prop = self.read_property()
             if prop is None:
                 break
             yield prop
 
+    def _read_projected(self):
+        fields = self.fields
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                break
+            name, proptype, size = frame
+
+            if name not in fields:
+                self.skip(size)
+                continue
+
+            value = self.unpack(proptype, self.read(size), fields[name])
+            yield proptype(name, proptype.typename, value)
+
     def read_header(self):
         """reads the file header and returns the number of characters in the
         file"""
         try:
-            self.file.seek(0)
+            self.seek(0)
         except io.UnsupportedOperation:
             pass
+        return self.read_pool_header()
 
+    def read_pool_header(self):
+        """reads a pool header from the current position and returns its
+        character count, such as for the next of several concatenated pools"""
         magic = self.read_int()
 
         if magic != -1:
@@ -70,6 +214,9 @@ class Parser():
         # empty files don't have a CharacterPool property
         if prop.name == 'PoolFileName':
             self.expect('None')
+            _count = self.read_int()
+            if _count != 0:
+                raise XCFParseError("Mismatched character counts: 0 != {}".format(_count))
             return 0
         elif prop.name != 'CharacterPool':
             raise XCFParseError("Expected Property CharacterPool:ArrayPropery, got {}:{}".format(prop.name, prop.typename))
@@ -110,29 +257,116 @@ class Parser():
     def read_property(self):
         """read a single property from the file, returns the relevant subtype
         of Property"""
-        name = self.read_str()
+        frame = self.read_frame()
+        if frame is None:
+            return None
+        name, proptype, size = frame
+
+        data = self.read(size)
+        value = self.unpack(proptype, data)
+
+        return proptype(name, proptype.typename, value)
+
+    def unpack(self, proptype, data, fields=None):
+        """decode a property value, 'fields' is the projection for a struct"""
+        if self.intern is not None and getattr(proptype, 'internable', False):
+            return self.intern.unpack(proptype, data)
+
+        if fields is None:
+            value = proptype.unpack(data)
+        else:
+            value = proptype.unpack(data, fields)
+
+        #structs hand back a parser for their payload, which should share our
+        #intern table, types and stats
+        if isinstance(value, Parser):
+            value.intern = self.intern
+            value.types = self.types
+            if self.stats is not None:
+                self.stats.attach(value)
+        return value
+
+    def read_frame(self):
+        """read the name/type/size framing of the next property, leaving the
+        file positioned at the start of its value. Returns a (name, proptype,
+        size) tuple or None at the end of a property block"""
+        #names repeat in every record so share a single copy of each
+        name = intern(self.read_str())
         self.skip_padding()
 
         if name == 'None':
             return None
 
-        typename = self.read_str()
+        typename = intern(self.read_str())
         self.skip_padding()
 
-        proptype = PropertyType(typename)
+        proptype = self.property_type(typename)
 
         size = self.read_int()
         self.skip_padding()
 
+        #structs carry their actual type after the size
+        if hasattr(proptype, 'resolve_type'):
+            proptype = proptype.resolve_type(self)
+
         #add a hook to modify size or read extra data if necessary because some properties don't
         #quite follow standard format
         if hasattr(proptype, 'data_read_hook'): 
             size = proptype.data_read_hook(self, size)
 
-        data = self.read(size)
-        value = proptype.unpack(data)
+        return (name, proptype, size)
+
+    def property_type(self, typename):
+        """returns the Property class for 'typename' from this parser's types"""
+        proptype = self.types.get(typename)
+        if proptype is None:
+            raise TypeError("Unknown PropertyType: {}".format(typename))
+        return proptype
+
+    def skip_property(self):
+        """skip over the next property without decoding its value, returns
+        False if there was no property to skip (the end of a block)"""
+        frame = self.read_frame()
+        if frame is None:
+            return False
+        self.skip(frame[2])
+        return True
+
+    def skip_properties(self):
+        """skip to the end of the current property block"""
+        while self.skip_property():
+            pass
+
+    def read_raw_properties(self):
+        """returns the raw bytes of the current property block, up to and
+        including the 'None' that ends it, without decoding anything. Only
+        reads forwards so works on streams"""
+        file = self.file
+        self.file = recorder = RecordingReader(file)
+        try:
+            self.skip_properties()
+        finally:
+            self.file = file
+        return bytes(recorder.data)
+
+    def at_end(self):
+        """returns True if there is nothing left to read"""
+        if not self.file.read(1):
+            return True
+        self.file.seek(-1, io.SEEK_CUR)
+        return False
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, pos):
+        self.file.seek(pos)
 
-        return Property(name, proptype.typename, value)
+    def skip(self, size):
+        try:
+            self.file.seek(size, io.SEEK_CUR)
+        except io.UnsupportedOperation:
+            self.read(size)
 
     def read(self, size):
         buf = self.file.read(size)
@@ -141,7 +375,7 @@ class Parser():
         return buf
 
     def read_int(self):
-        return struct.unpack("<i", self.read(4))[0]
+        return INT.unpack(self.read(4))[0]
 
     def read_str(self):
         size = self.read_int()
@@ -160,3 +394,230 @@ class Parser():
         pad = self.read_int()
         if pad != 0:
             raise XCFParseError("Expected null padding DWORD, got {}".format(pad))
+
+class StreamParser(Parser):
+    """Parser for file objects that are slow to read a few bytes at a time,
+    such as pipes and compressed archive members. The file is read ahead in
+    blocks of 'block_size' bytes and the parser's small reads are served from
+    that instead.
+
+    Reading only ever goes forwards through the file, it's only seeked if
+    asked to move back to before what is buffered"""
+
+    def __init__(self, f, fields=None, decoder=None, intern=None, types=None,
+                 block_size=BLOCK_SIZE, stats=None):
+        super().__init__(f, fields, decoder, intern, types, stats)
+        self.block_size = block_size
+        self.block = b''
+        self.pos = 0
+        self.offset = 0
+        self._keep = None
+
+    def __enter__(self):
+        super().__enter__()
+        self.block = b''
+        self.pos = 0
+        try:
+            self.offset = self.file.tell()
+        except (OSError, ValueError):
+            self.offset = 0
+        return self
+
+    def fill(self, size):
+        """read ahead until at least 'size' bytes are buffered"""
+        keep = self.pos if self._keep is None else self._keep - self.offset
+        chunks = [self.block[keep:]]
+        have = len(self.block) - self.pos
+        while have < size:
+            data = self.file.read(max(self.block_size, size - have))
+            if not data:
+                break
+            chunks.append(data)
+            have += len(data)
+
+        self.block = b''.join(chunks)
+        self.offset += keep
+        self.pos -= keep
+        if have < size:
+            raise IOError("Read Error")
+
+    def at_end(self):
+        if self.pos < len(self.block):
+            return False
+        try:
+            self.fill(1)
+        except IOError:
+            return True
+        return False
+
+    def tell(self):
+        return self.offset + self.pos
+
+    def seek(self, pos):
+        if self.offset <= pos <= self.offset + len(self.block):
+            self.pos = pos - self.offset
+            return
+        self.file.seek(pos)
+        self.block = b''
+        self.offset = pos
+        self.pos = 0
+
+    def read_raw_properties(self):
+        start = self.tell()
+        self._keep = start
+        try:
+            self.skip_properties()
+        finally:
+            self._keep = None
+        return self.block[start - self.offset:self.pos]
+
+    def skip(self, size):
+        if size < 0:
+            raise IOError("Read Error")
+        if len(self.block) - self.pos < size:
+            self.fill(size)
+        self.pos += size
+
+    def read(self, size):
+        if size < 0:
+            raise IOError("Read Error")
+        if len(self.block) - self.pos < size:
+            self.fill(size)
+        pos = self.pos
+        self.pos += size
+        return self.block[pos:pos + size]
+
+    def read_int(self):
+        if len(self.block) - self.pos < 4:
+            self.fill(4)
+        value, = INT.unpack_from(self.block, self.pos)
+        self.pos += 4
+        return value
+
+    def read_str(self):
+        size = self.read_int()
+        if size == 0:
+            return ''
+
+        bstr = self.read(size)
+
+        #strings should be null terminated
+        if bstr[-1] != 0:
+            raise XCFParseError("Incorrect String size: {}".format(size))
+
+        return bstr[:-1].decode("latin_1")
+
+class BufferParser(Parser):
+    """Parser that decodes straight out of a single in-memory buffer instead of
+    making lots of small reads on a file object. Can be given any bytes-like
+    object or a file name, in which case the file is memory mapped.
+
+    read() hands back memoryview slices of the buffer so nothing gets copied
+    until a value is actually decoded"""
+
+    def __init__(self, source, fields=None, decoder=None, intern=None, types=None, stats=None):
+        self.fields = fields
+        self.decoder = decoder
+        self.intern = intern
+        self.types = PropertyType.registry() if types is None else types
+        self.stats = None
+        if stats is not None:
+            stats.attach(self)
+        self._mmap = None
+        self.pos = 0
+        if isinstance(source, str):
+            self.fname = source
+            self.buffer = None
+        else:
+            self.fname = None
+            self.buffer = memoryview(source).cast('B')
+
+    def __enter__(self):
+        #if 'fname' is None we were passed a buffer and have nothing to open
+        if self.fname is None:
+            return self
+
+        #can't map stdin so just slurp it
+        if self.fname == '-':
+            from sys import stdin
+            self.buffer = memoryview(stdin.buffer.read())
+            return self
+
+        with open(self.fname, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                #empty files can't be mapped
+                self.buffer = memoryview(f.read())
+            else:
+                self.buffer = memoryview(self._mmap)
+        self.pos = 0
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.fname is None:
+            return
+
+        self.buffer = None
+        if self._mmap is not None:
+            #anything still holding a slice of the buffer keeps the map alive,
+            #in which case it gets closed when the last slice goes away
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+            self._mmap = None
+
+    def at_end(self):
+        return self.pos >= len(self.buffer)
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos):
+        self.pos = pos
+
+    def read_raw_properties(self):
+        start = self.pos
+        self.skip_properties()
+        return self.buffer[start:self.pos]
+
+    def skip(self, size):
+        end = self.pos + size
+        if size < 0 or end > len(self.buffer):
+            raise IOError("Read Error")
+        self.pos = end
+
+    def read(self, size):
+        pos = self.pos
+        end = pos + size
+        if size < 0 or end > len(self.buffer):
+            raise IOError("Read Error")
+        self.pos = end
+        return self.buffer[pos:end]
+
+    def read_int(self):
+        try:
+            value, = INT.unpack_from(self.buffer, self.pos)
+        except struct.error:
+            raise IOError("Read Error")
+        self.pos += 4
+        return value
+
+    def read_str(self):
+        size = self.read_int()
+        if size == 0:
+            return ''
+
+        buf = self.buffer
+        pos = self.pos
+        end = pos + size
+        if size < 0 or end > len(buf):
+            raise IOError("Read Error")
+
+        #strings should be null terminated
+        if buf[end - 1] != 0:
+            raise XCFParseError("Incorrect String size: {}".format(size))
+
+        self.pos = end
+        return str(buf[pos:end - 1], "latin_1")
@@ -1,19 +1,409 @@
+import os
+import tempfile
+from collections import deque
+from time import perf_counter
+
 from .character import Character
-from .parser import Parser
+from .properties.struct import StructProperty
+from .parser import Parser, BufferParser, StreamParser, InternTable
+
+def read_character(parser):
+    """decode the next character record from 'parser', keeping the record's
+    bytes as the Character's source if the parser holds them in memory"""
+    stats = parser.stats
+    if stats is not None:
+        started = perf_counter()
+
+    start = parser.tell()
+    char = Character(parser.properties())
+    buffer = getattr(parser, 'buffer', None)
+    if buffer is not None:
+        char.source = buffer[start:parser.tell()]
+
+    if stats is not None:
+        stats.on_character(perf_counter() - started)
+    return char
+
+def decode_records(source, buffered, offsets, fields=None, compiled=False, intern=True):
+    """decode the character records at the given (start, end) offsets of a
+    pool, used by CharacterPool.characters() to decode on workers"""
+    pool = CharacterPool(source, buffered, compiled=compiled, intern=intern)
+    with pool.parser(fields) as parser:
+        chars = []
+        for start, _ in offsets:
+            parser.seek(start)
+            char = read_character(parser)
+            #decode structs here too, left for whoever gets the characters
+            #they'd take most of the time the workers were meant to save
+            for prop in char.fields.values():
+                if isinstance(prop, StructProperty):
+                    prop.decode()
+            chars.append(char)
+        return chars
 
 class CharacterPool():
-    
-    def __init__(self, fname):
+    """A character pool file. 'fname' can be a file name, '-' for stdin, an
+    open binary file or any bytes-like object holding the file contents.
+
+    By default named files are memory mapped and decoded with a BufferParser,
+    pass buffered=False to read them through a plain file object instead.
+    Stdin and open files are read ahead in large blocks with a StreamParser.
+
+    The pool can be indexed and sliced like a list of Characters, the first
+    time this is done an index of where each character record starts and ends
+    is built by walking the property framing without decoding any values.
+
+    Passing an IndexCache as 'cache' stores that index, along with a summary
+    of each character, on disk so later CharacterPools for the same unchanged
+    file can list, count and filter characters without parsing it again.
+
+    'compiled' switches to decoding characters with the schema specific
+    decoders from xcfp.compiled.
+
+    Repeated Name and short Str values are decoded once and shared between
+    characters through an InternTable. By default each pool has its own,
+    'intern' can instead be an InternTable to share (such as
+    xcfp.parser.SHARED_INTERN) or False to turn interning off.
+
+    'stats' is an optional xcfp.stats.ParseStats that every parser the pool
+    reads with reports to"""
+
+    def __init__(self, fname, buffered=True, cache=None, compiled=False, intern=True, stats=None):
         self.fname = fname
+        self.buffered = buffered
+        self.cache = cache
+        self.compiled = compiled
+        self.stats = stats
+        if intern is True:
+            intern = InternTable()
+        elif intern is False:
+            intern = None
+        self.intern = intern
+        self._offsets = None
+        self._summaries = None
+
+    @classmethod
+    def from_archive(cls, path, **kwargs):
+        """yields (member name, CharacterPool) for each .bin member of a zip or
+        tar (optionally compressed) archive, read straight out of the archive
+        without extracting it. Each pool streams its member so can only be
+        read once, before moving on to the next one. Other keyword arguments
+        are passed to CharacterPool"""
+        from .archive import archive_members
+        for name, f in archive_members(path):
+            yield (name, cls(f, **kwargs))
+
+    def parser(self, fields=None):
+        """returns a new Parser for this pool, use it as a context manager to
+        open the underlying file. 'fields' is a Parser projection"""
+        decoder = self._decoder()
+        source = self.fname
+        stats = self.stats
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return BufferParser(source, fields, decoder, self.intern, stats=stats)
+        if isinstance(source, str) and source != '-':
+            if self.buffered:
+                return BufferParser(source, fields, decoder, self.intern, stats=stats)
+            return Parser(source, fields, decoder, self.intern, stats=stats)
+        #stdin and other file objects are read ahead in blocks
+        return StreamParser(source, fields, decoder, self.intern, stats=stats)
+
+    def _decoder(self):
+        if self.compiled:
+            from .compiled import decoder_for
+            return decoder_for(Character)
+        return None
+
+    def decode(self, record, fields=None):
+        """decode the raw bytes of one character record with this pool's
+        settings, 'fields' is a Parser projection"""
+        with BufferParser(record, fields, self._decoder(), self.intern, stats=self.stats) as parser:
+            return read_character(parser)
+
+    def read_record(self, parser, fields=None):
+        """decode the next record from one of this pool's parsers, keeping
+        the record's bytes as the Character's source. Streams are read a
+        record at a time to do so"""
+        if getattr(parser, 'buffer', None) is not None:
+            return read_character(parser)
+        return self.decode(parser.read_raw_properties(), fields)
+
+    def characters(self, workers=None, executor='process', fields=None):
+        """returns an iterator for the characters in this file.
+
+        'fields' is a list of Character attribute names, e.g. ['firstName',
+        'appearance.gender'], to decode. Any other properties are skipped
+        without being decoded and read back as their defaults.
+
+        With 'workers' set the records are split into chunks and decoded in
+        parallel on a 'process' or 'thread' pool (or an existing Executor),
+        the characters are still returned in file order. This needs the pool
+        to be a file name or a bytes-like object"""
+        if fields is not None:
+            fields = Character.projection(fields)
+
+        if workers is not None and workers > 1:
+            return self._characters_parallel(workers, executor, fields)
+        return self._characters(fields)
+
+    def _characters(self, fields):
+        with self.parser(fields) as parser:
+            count = parser.read_header()
+
+            for _ in range(count):
+                yield read_character(parser)
+
+    def characters_threaded(self, executor, fields=None, workers=None):
+        """returns an iterator over the characters in this file, decoded in
+        chunks on 'executor', a ThreadPoolExecutor or other Executor running
+        in this process, and returned in file order. Each chunk gets its own
+        parser and they all share this pool's InternTable.
+
+        'workers' is how many threads to keep busy, by default the number of
+        CPUs. 'fields' is as for characters()"""
+        if fields is not None:
+            fields = Character.projection(fields)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return self._characters_parallel(workers, executor, fields, self.intern)
+
+    async def acharacters(self, fields=None, chunk_size=None):
+        """asynchronously yields the characters of a pool being read from an
+        asyncio.StreamReader or other async byte source (see
+        xcfp.aio.AsyncParser), each one as soon as all of its bytes have
+        arrived. 'fields' is as for characters()"""
+        from .aio import AsyncParser, CHUNK_SIZE
+
+        if fields is not None:
+            fields = Character.projection(fields)
+
+        parser = AsyncParser(self.fname, chunk_size or CHUNK_SIZE)
+        async for record in parser.records():
+            yield self.decode(record, fields)
+
+    def _characters_parallel(self, workers, executor, fields, intern=True):
+        from concurrent.futures import Executor, ThreadPoolExecutor
+        from .scan import make_executor
+
+        if not isinstance(self.fname, (str, bytes, bytearray, memoryview)) or self.fname == '-':
+            raise ValueError("Parallel decoding needs a file name or buffer, not {!r}".format(self.fname))
 
+        offsets = self.offsets()
+        #a few chunks per worker so a slow chunk doesn't hold the rest up
+        chunk_size = max(1, -(-len(offsets) // (workers * 4)))
+        chunks = [offsets[i:i + chunk_size] for i in range(0, len(offsets), chunk_size)]
 
-    def characters(self):
-        """returns an iterator for the characters in this file"""
+        owned = not isinstance(executor, Executor)
+        pool = make_executor(executor, workers) if owned else executor
 
-        with Parser(self.fname) as parser:
+        #threads can share a buffer as it is but anything else would have it
+        #pickled into every chunk, so it's written out once for the workers
+        #to map instead
+        source = self.fname
+        spilled = None
+        queue = deque()
+        try:
+            if not isinstance(source, str) and not isinstance(pool, ThreadPoolExecutor):
+                fd, spilled = tempfile.mkstemp(suffix='.bin')
+                with open(fd, 'wb') as f:
+                    f.write(source)
+                source = spilled
+
+            for chunk in chunks:
+                queue.append(pool.submit(decode_records, source, self.buffered, chunk,
+                                         fields, self.compiled, intern))
+                if len(queue) >= 2 * workers:
+                    yield from queue.popleft().result()
+            while queue:
+                yield from queue.popleft().result()
+        finally:
+            for future in queue:
+                future.cancel()
+            if owned:
+                pool.shutdown(cancel_futures=True)
+            if spilled is not None:
+                os.unlink(spilled)
+
+    def to_table(self, fields=None, **kwargs):
+        """returns a CharacterTable holding 'fields' (dotted attribute names,
+        default all of them) of every character, decoding only those fields.
+        Other keyword arguments are passed on to characters()"""
+        from .table import CharacterTable
+        chars = self.characters(fields=fields, **kwargs)
+        return CharacterTable.from_characters(chars, fields)
+
+    def to_columns(self, fields=None):
+        """returns NumPy arrays of 'fields' for every character, see
+        xcfp.columns.to_columns()"""
+        from .columns import to_columns
+        return to_columns(self, fields)
+
+    def grep(self, pattern, fields=None):
+        """yields (index, Character) for characters with a field matching
+        'pattern', searching the raw file bytes first so only records with a
+        possible match get decoded, see xcfp.grep"""
+        from .grep import grep
+        return grep(self, pattern, fields)
+
+    def export_snapshot(self, fname, fields=None):
+        """write the characters to a columnar snapshot file that can be
+        reopened quickly with xcfp.open_snapshot(), see xcfp.snapshot"""
+        from .snapshot import export_snapshot
+        export_snapshot(self, fname, fields)
+
+    def records(self, fields=None):
+        """yields (record, Character) for each character, where 'record' is
+        the raw bytes of the character's record in the file and the Character
+        has only 'fields' (attribute names, default all of them) decoded. Pass
+        an empty list to only walk the records"""
+        if fields is not None:
+            fields = Character.projection(fields)
+
+        with self.parser(fields) as parser:
+            count = parser.read_header()
+            for _ in range(count):
+                char = self.read_record(parser, fields)
+                yield (char.source, char)
+
+    def split(self, key, dest, fields=None):
+        """split the characters into a new pool for each value of 'key', see
+        xcfp.merge.split()"""
+        from .merge import split
+        return split(self, key, dest, fields)
+
+    def save(self, characters=None, dest=None, updates=None):
+        """write a pool to 'dest', by default over this pool's own file.
+
+        'characters' is the list of Characters to write, otherwise this pool's
+        records are written with any in 'updates', a dict of index to
+        Character, replaced. Records and Characters that haven't been modified
+        are copied as raw bytes rather than encoded again, see PoolWriter"""
+        from .writer import PoolWriter
+
+        if dest is None:
+            dest = self.fname
+            if not isinstance(dest, str) or dest == '-':
+                raise ValueError("Can't save over {!r}, give a dest".format(dest))
+
+        with self.parser() as parser:
+            if characters is None:
+                updates = updates or {}
+                characters = []
+                for i, (start, end) in enumerate(self.offsets()):
+                    char = updates.get(i)
+                    if char is None:
+                        parser.seek(start)
+                        char = parser.read(end - start)
+                    characters.append(char)
+
+            with PoolWriter(dest) as writer:
+                writer.write(characters)
+
+        if dest == self.fname:
+            self._offsets = None
+            self._summaries = None
+
+    def validate(self, strict=False):
+        """check the file's structure by walking its property framing without
+        decoding any values, returns an xcfp.validate.ValidationReport listing
+        any problems. 'strict' also checks the layout of each value and that
+        nothing follows the last record"""
+        from .validate import validate
+
+        source = self.fname
+        if hasattr(source, 'read'):
+            source = source.read()
+        fname = self.fname if isinstance(self.fname, str) else None
+        with BufferParser(source) as parser:
+            #walking the map itself rather than a view lets the framing be
+            #looked up by slices of it
+            mapped = parser._mmap
+            return validate(parser.buffer if mapped is None else mapped, strict, fname)
+
+    def offsets(self):
+        """returns a list of (start, end) byte offsets of each character
+        record in the file, building it on first use"""
+        if self._offsets is None:
+            if self._cacheable():
+                self._load_cached()
+            else:
+                self._build_index()
+        return self._offsets
+
+    def summaries(self):
+        """returns a list with a Character.summary() dict for each character
+        in the file"""
+        if self._summaries is None:
+            if self._cacheable():
+                self._load_cached()
+            else:
+                self._build_index(summaries=True)
+        return self._summaries
+
+    def filter(self, **criteria):
+        """returns the indexes of the characters whose summary fields equal
+        all the given values, e.g. pool.filter(country='Country_UK')"""
+        for name in criteria:
+            if name not in Character.summary_fields:
+                raise KeyError("Can't filter on non-summary field: {}".format(name))
+
+        return [i for i, summary in enumerate(self.summaries())
+                if all(summary[name] == value for name, value in criteria.items())]
+
+    def _cacheable(self):
+        return self.cache is not None and isinstance(self.fname, str) and self.fname != '-'
+
+    def _load_cached(self):
+        cached = self.cache.load(self.fname)
+        if cached is not None:
+            self._offsets, self._summaries = cached
+            return
+
+        self._build_index(summaries=True)
+        self.cache.store(self.fname, self._offsets, self._summaries)
+
+    def _build_index(self, summaries=False):
+        offsets = []
+        summary_list = [] if summaries else None
+        with self.parser(Character.projection(Character.summary_fields)) as parser:
             count = parser.read_header()
 
             for _ in range(count):
-                char = Character()
-                char.add_properties(parser.properties())
-                yield char
+                start = parser.tell()
+                if summaries:
+                    summary_list.append(Character(parser.properties()).summary())
+                else:
+                    parser.skip_properties()
+                offsets.append((start, parser.tell()))
+
+        self._offsets = offsets
+        if summaries:
+            self._summaries = summary_list
+
+    def iter_range(self, start, stop):
+        """returns an iterator over characters start to stop (exclusive),
+        seeking directly to each record"""
+        offsets = self.offsets()[start:stop]
+        with self.parser() as parser:
+            for record_start, _ in offsets:
+                parser.seek(record_start)
+                yield read_character(parser)
+
+    def __iter__(self):
+        return self.characters()
+
+    def __len__(self):
+        return len(self.offsets())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return list(self.iter_range(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("CharacterPool index out of range")
+        return next(self.iter_range(key, key + 1))
@@ -1,10 +1,32 @@
+from struct import Struct
+from threading import Lock
+from types import MappingProxyType
+
+INT  = Struct('<i')
+SIZE = Struct('<ii')
+PAD  = bytes(4)
+
+def pack_str(value):
+    """returns the file encoding of a string"""
+    data = value.encode('latin_1') + b'\x00'
+    return INT.pack(len(data)) + data
+
+#the property that ends a set of properties
+END = pack_str('None') + PAD
+
 class PropertyError(Exception):
     pass
 
 class PropertyType(type):
-    """Meta class for properties"""
+    """Meta class for properties
+
+    Parsers look types up in an immutable snapshot of the registry taken when
+    they're created (see registry()), so types can be registered while other
+    threads are parsing"""
 
     knownTypes = {}
+    _registry = MappingProxyType({})
+    _lock = Lock()
 
     def __new__(cls, name, *args, **kwargs):
 
@@ -27,20 +49,37 @@ class PropertyType(type):
     def register(cls, property_cls, name = None):
         if name is None:
             name = property_cls.typename
-        cls.knownTypes[name] = property_cls
+        with PropertyType._lock:
+            cls.knownTypes[name] = property_cls
+            PropertyType._update_registry()
 
     @classmethod
     def deregister(cls, key):
-        if key in cls.knownTypes:
-            del cls.knownTypes[key]
-        elif hasattr(key, 'typename') and key.typename in cls.knownTypes:
-            del cls.knownTypes[key.typename]
-        else:
-            raise TypeError("Tried to deregister unkown PropertyType: {}".format(key))
+        with PropertyType._lock:
+            if key in cls.knownTypes:
+                del cls.knownTypes[key]
+            elif hasattr(key, 'typename') and key.typename in cls.knownTypes:
+                del cls.knownTypes[key.typename]
+            else:
+                raise TypeError("Tried to deregister unkown PropertyType: {}".format(key))
+            PropertyType._update_registry()
+
+    @staticmethod
+    def _update_registry():
+        #replaced rather than changed so snapshots already handed out stay
+        #as they were
+        PropertyType._registry = MappingProxyType(dict(PropertyType.knownTypes))
+
+    @staticmethod
+    def registry():
+        """returns a read only snapshot of the registered types, by name"""
+        return PropertyType._registry
 
 class Property(metaclass=PropertyType):
     """Base class for properties"""
 
+    __slots__ = ('name', 'value')
+
     def __new__(cls, *args):
 
         #if we're in a subclass don't use special magic
@@ -62,17 +101,25 @@ class Property(metaclass=PropertyType):
         return str(self.value)
 
     def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
         #get the actual Property if we've set one, otherwise this one acts as a
         #default
         actual = instance.fields.get(self.name, self)
         return actual._get()
 
     def __set__(self, instance, value):
+        if getattr(instance, 'default', False):
+            raise PropertyError(
+                "Can't set {} on the default {}, add a {} property first"
+                .format(self.name, instance.name, instance.typename)
+            )
         if self.name in instance.fields:
             instance.fields.get(self.name)._set(value)
+            instance.touch(self.name)
         else:
-            new_property = Property(self.name, self.typename, value)
-            instance.fields.set(self.name, new_property)
+            instance.add_property(Property(self.name, self.typename, value))
 
     def _get(self):
         return self.value
@@ -81,7 +128,7 @@ class Property(metaclass=PropertyType):
         if not isinstance(value, self.expected_type):
             raise PropertyError(
                 "Tried to intantiate a Property of type {} with non-{} type: {}"
-                .format(self.typename, expected_type.__name__, type(value).__name__)
+                .format(self.typename, self.expected_type.__name__, type(value).__name__)
             )
 
         self.value = value
@@ -90,6 +137,33 @@ class Property(metaclass=PropertyType):
     def unpack(cls, data):
         raise NotImplementedError()
 
+    @classmethod
+    def pack(cls, value):
+        """returns the file encoding of 'value', the inverse of unpack()"""
+        raise NotImplementedError()
+
+    def encode_value(self):
+        return self.pack(self.value)
+
+    def encode(self):
+        """returns the whole property, name and type framing included, as it
+        is stored in a file"""
+        data = self.encode_value()
+        return b''.join((pack_str(self.name), PAD, pack_str(self.typename), PAD,
+                         SIZE.pack(self.stored_size(data), 0), data))
+
+    @classmethod
+    def stored_size(cls, data):
+        """the size written in the framing for a value encoded as 'data'"""
+        return len(data)
+
+    @classmethod
+    def check_value(cls, data):
+        """returns what's wrong with 'data' as an encoded value of this type,
+        or None if it looks alright. Only checks the layout, without decoding
+        anything"""
+        return None
+
 #make sure modules with Property subclasses get loaded whenever this package is
 #used
 from . import atomic
@@ -1,34 +1,53 @@
 #!/usr/bin/python3
 
 import struct
-from . import Property, PropertyError
+from . import Property, PropertyError, INT, pack_str
+
+BOOL = struct.Struct('?')
 
 class IntProperty(Property):
     """Integer Property - represented as a little endian DWORD"""
 
     typename = 'IntProperty'
+    __slots__ = ()
     expected_type = int
 
     @classmethod
     def unpack(cls, data):
-        return struct.unpack('<i', data)[0]
+        return INT.unpack(data)[0]
+
+    @classmethod
+    def pack(cls, value):
+        return INT.pack(value)
+
+    @classmethod
+    def check_value(cls, data):
+        if len(data) != 4:
+            return "{} of {} bytes, expected 4".format(cls.typename, len(data))
+        return None
 
 class ArrayProperty(IntProperty):
     """Array Property - acts as an IntProperty with value of the number of
     elements in the array"""
 
     typename = 'ArrayProperty'
+    __slots__ = ()
 
 class BoolProperty(Property):
     """Boolean Property - represented by a single byte, 0x00 is False anything
     else is True"""
 
     typename = 'BoolProperty'
+    __slots__ = ()
     expected_type = bool
 
     @classmethod
     def unpack(cls, data):
-        return struct.unpack('?', data)[0]
+        return BOOL.unpack(data)[0]
+
+    @classmethod
+    def pack(cls, value):
+        return BOOL.pack(value)
 
     #BoolProperty gives incorrect size - should be 1 but shows as 0
     @classmethod
@@ -37,34 +56,70 @@ class BoolProperty(Property):
             return 1
         return size
 
+    @classmethod
+    def stored_size(cls, data):
+        return 0
+
+    @classmethod
+    def check_value(cls, data):
+        if len(data) != 1:
+            return "{} of {} bytes, expected 1".format(cls.typename, len(data))
+        return None
+
+def check_str(data, extra=0):
+    """returns what's wrong with 'data' as an encoded string followed by
+    'extra' more bytes, or None"""
+    if len(data) < 4 + extra:
+        return "{} bytes is too short for a string".format(len(data))
+    size = INT.unpack_from(data)[0]
+    if size + 4 + extra != len(data):
+        return "string of {} bytes in a {} byte value".format(size, len(data))
+    if size and data[size + 3] != 0:
+        return "string isn't null terminated"
+    return None
+
 class StrProperty(Property):
     """String Property - repersented by a little endian DWORD containing the
     string length followed by a null terminated string - assuming latin-1
     encoding"""
 
     typename = 'StrProperty'
+    __slots__ = ()
     expected_type = str
+    internable = True
 
     @classmethod
     def unpack(cls, data):
-        size = IntProperty.unpack(data[:4])
-        if len(data[4:]) != size:
+        size = INT.unpack_from(data)[0]
+        if len(data) - 4 != size:
             raise PropertyError("Incorrect String Size in StrProperty: {}".format(size))
-        return data[4:-1].decode("latin_1")
+        #decode through a view so slicing off the length and null doesn't copy
+        return str(memoryview(data)[4:-1], "latin_1")
+
+    @classmethod
+    def pack(cls, value):
+        return pack_str(value)
+
+    @classmethod
+    def check_value(cls, data):
+        return check_str(data)
 
 class NameProperty(Property):
     """Name Property - represented as a StrProperty followed by a DWORD that is
     usually (but not always) 0. As the function of this DWORD is unknown for
     the moment we just represent the value of NameProperty as a (str, int)
-    tuple"""
+    tuple when read and written, with the int kept as 'param' and the str as
+    the value"""
 
     typename = 'NameProperty'
+    __slots__ = ('param',)
     expected_type = str
+    internable = True
 
     def _set(self, value):
-        try:
+        if isinstance(value, tuple):
             (name, param) = value
-        except ValueError:
+        else:
             (name, param) = (value, 0)
 
         if not isinstance(param, int):
@@ -73,9 +128,25 @@ class NameProperty(Property):
                     .format(type(param).__name__)
                 )
         super()._set(name)
+        self.param = param
 
     @classmethod
     def unpack(cls, data):
-        name = StrProperty.unpack(data[:-4])
-        val = IntProperty.unpack(data[-4:])
+        size = INT.unpack_from(data)[0]
+        if len(data) - 8 != size:
+            raise PropertyError("Incorrect String Size in NameProperty: {}".format(size))
+        name = str(memoryview(data)[4:-5], "latin_1")
+        val = INT.unpack_from(data, len(data) - 4)[0]
         return (name, val)
+
+    @classmethod
+    def pack(cls, value):
+        (name, param) = value
+        return pack_str(name) + INT.pack(param)
+
+    def encode_value(self):
+        return self.pack((self.value, self.param))
+
+    @classmethod
+    def check_value(cls, data):
+        return check_str(data, 4)
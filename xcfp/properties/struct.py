@@ -1,9 +1,13 @@
 #!/usr/bin/python
 from collections import OrderedDict
+from threading import Lock
 
-from . import PropertyType, Property
+from . import PropertyType, Property, SIZE, PAD, pack_str
 from ..property_set import PropertySet, PropertySetMeta
 
+#guards putting a struct's decoded fields in place
+_decode_lock = Lock()
+
 # As a class can only have 1 metaclass and StructPropertys inherit from 2 classes
 # that each have their own metaclass we need to resolve this conflict. As it
 # happens both PropertyType and PropertySetMeta are friendly enough that we
@@ -19,38 +23,129 @@ class StructMeta(PropertySetMeta, PropertyType):
 
 class StructProperty(Property, PropertySet, metaclass=StructMeta):
     """Struct Property - a struct represented as a sequence of properties ended
-    with 'None'"""
+    with 'None'
+
+    When read from a file the struct's payload is kept undecoded until one of
+    its fields is first used"""
 
     typename = 'StructProperty'
 
+    __slots__ = ('_fields', '_pending', 'source', 'dirty', 'struct_name', 'default')
+
     def __init__(self, name, typename, properties=None, **kwargs):
+        from ..parser import Parser
         self.name = name
-        PropertySet.__init__(self, properties, **kwargs)
+        if typename == StructProperty.typename:
+            typename = type(self).typename
+        self.struct_name = typename
+        self._pending = None
+        #set on structs standing in as a PropertySet's default, see
+        #PropertySetMeta
+        self.default = False
+        if isinstance(properties, Parser):
+            PropertySet.__init__(self, None, **kwargs)
+            self._pending = properties
+            self.source = getattr(properties, 'buffer', None)
+        else:
+            PropertySet.__init__(self, properties, **kwargs)
+
+    @property
+    def fields(self):
+        self.decode()
+        return self._fields
+
+    def decode(self):
+        """decode the struct's payload now rather than when one of its fields
+        is first used"""
+        pending = self._pending
+        if pending is not None:
+            self._decode(pending)
+
+    def _decode(self, pending):
+        #other threads can get here at the same time, so each decodes with
+        #its own parser into its own dict and only the first to finish puts
+        #its result in place. _pending is cleared last so the fields are
+        #always complete once it's None
+        from ..parser import BufferParser
+        parser = BufferParser(pending.buffer, pending.fields, pending.decoder,
+                              pending.intern, pending.types, stats=pending.stats)
+        fields = dict(self._fields)
+        for prop in parser.properties():
+            fields[prop.name] = prop
+        with _decode_lock:
+            if self._pending is pending:
+                self._fields = fields
+                self._pending = None
+
+    @fields.setter
+    def fields(self, value):
+        self._fields = value
+
+    @property
+    def decoded(self):
+        """whether the struct's payload has been decoded yet"""
+        return self._pending is None
+
+    @property
+    def modified(self):
+        if self._pending is not None:
+            return self.source is None
+        return PropertySet.modified.fget(self)
+
+    def __getstate__(self):
+        #views of the file can't be pickled so send the raw payload instead
+        pending = self._pending
+        source = self.source
+        if pending is not None:
+            pending = (pending.buffer.tobytes(), pending.fields)
+            source = None
+        elif source is not None:
+            source = bytes(source)
+        return (self.name, self.struct_name, self._fields, pending, source, self.dirty)
+
+    def __setstate__(self, state):
+        from ..parser import BufferParser
+        self.name, self.struct_name, self._fields, pending, self.source, self.dirty = state
+        self._pending = None
+        self.default = False
+        if pending is not None:
+            self._pending = BufferParser(*pending)
+            self.source = self._pending.buffer
 
     def _get(self):
         return self
 
     @classmethod
-    def unpack(cls, data):
-        from ..parser import Parser
-        import io
-        return Parser(io.BytesIO(data)).properties()
+    def unpack(cls, data, fields=None):
+        #the parser is only run when the struct's fields are first used. It
+        #decodes in place from a view of the parent's buffer rather than
+        #copying the payload out into a BytesIO
+        from ..parser import BufferParser
+        return BufferParser(data, fields)
+
+    def encode(self):
+        data = self.to_bytes()
+        return b''.join((pack_str(self.name), PAD, pack_str(StructProperty.typename), PAD,
+                         SIZE.pack(len(data), 0), pack_str(self.struct_name), PAD, data))
 
     def __str__(self):
-        return "<struct: {}>".format(self.typename)
+        return "<struct: {}>".format(self.struct_name)
 
     @classmethod
-    def data_read_hook(cls, parser, size):
-        cls.typename = parser.read_str()
+    def resolve_type(cls, parser):
+        """the struct's own type name follows the size in the framing, and
+        picks the StructProperty subclass that decodes it"""
+        struct_name = parser.read_str()
         parser.skip_padding()
-
-        return size
+        return parser.property_type(struct_name)
 
 class AppearanceStruct(StructProperty):
     """represents a TAppearance struct in a character file"""
 
     typename = 'TAppearance'
 
+    __slots__ = ()
+
     #defaults taken from Ana Ramirez from the Demos&Replays.bin file that
     #comes with the game
     head   = Property('nmHead',  'NameProperty','LatFem_C')
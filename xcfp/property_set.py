@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 from collections import OrderedDict
-from .properties import Property
+from .properties import Property, END
 
 class PropertySetMeta(type):
     """Metaclass for PropertySets
@@ -19,13 +19,30 @@ class PropertySetMeta(type):
             if not isinstance(value, Property):
                 continue
             result.field_names[name] = value.name
+            #nested sets are shared defaults for every instance without one
+            #of their own, so mustn't be changed through them
+            if isinstance(value, PropertySet):
+                value.default = True
         return result
 
 class PropertySet(metaclass=PropertySetMeta):
-    """Base class for classes that consist of a set of named properties"""
+    """Base class for classes that consist of a set of named properties.
+
+    Subclasses store their properties in a 'fields' dict of property name to
+    Property, concrete subclasses should declare it in __slots__ so instances
+    don't carry a __dict__ as well.
+
+    Sets read from a file keep the bytes they were read from as 'source', and
+    the names of the properties changed since then in 'dirty', so they can be
+    written back out by copying everything that hasn't changed. Changes are
+    tracked when made through attributes or add_property()"""
+
+    __slots__ = ()
 
     def __init__(self, properties=None, **kwargs):
         self.fields = {}
+        self.source = None
+        self.dirty = None
         if properties is not None:
             self.add_properties(properties)
 
@@ -35,8 +52,120 @@ class PropertySet(metaclass=PropertySetMeta):
 
     def add_property(self, property):
         self.fields[property.name] = property
-        
+        if self.source is not None:
+            self.touch(property.name)
+
+    def touch(self, name):
+        """mark property 'name' as changed since the set was read"""
+        if self.source is None:
+            return
+        if self.dirty is None:
+            self.dirty = set()
+        self.dirty.add(name)
+
+    @property
+    def modified(self):
+        """whether the set differs from its source, always True for sets that
+        weren't read from a file"""
+        if self.source is None or self.dirty:
+            return True
+        return any(prop.modified for prop in self.fields.values() if isinstance(prop, PropertySet))
+
+    def to_bytes(self):
+        """returns the properties encoded as in a file, ending with 'None'.
+        Unmodified sets return their source as it is, otherwise only the
+        changed properties are encoded again and the rest copied from the
+        source"""
+        source = self.source
+        if source is None:
+            return b''.join([prop.encode() for prop in self.fields.values()] + [END])
+        if not self.modified:
+            return source
+        return self._patch(source)
+
+    def _patch(self, source):
+        from .parser import BufferParser
+        fields = self.fields
+        targets = set(self.dirty or ())
+        targets.update(name for name, prop in fields.items()
+                       if isinstance(prop, PropertySet) and prop.modified)
+
+        #everything between the changed properties is copied in one go, as is
+        #the rest of the source once the last of them has been found. That
+        #also keeps any properties a projection didn't decode
+        chunks = []
+        copied = 0
+        with BufferParser(source) as parser:
+            while targets:
+                start = parser.tell()
+                frame = parser.read_frame()
+                if frame is None:
+                    break
+                parser.skip(frame[2])
+
+                name = frame[0]
+                if name in targets:
+                    targets.discard(name)
+                    chunks.append(source[copied:start])
+                    chunks.append(fields[name].encode())
+                    copied = parser.tell()
+            else:
+                chunks.append(source[copied:])
+                return b''.join(chunks)
+
+        #properties that weren't in the source go on the end
+        chunks.append(source[copied:start])
+        chunks.extend(prop.encode() for name, prop in fields.items() if name in targets)
+        chunks.append(END)
+        return b''.join(chunks)
 
     def add_properties(self, iter):
         for property in iter:
             self.add_property(property)
+
+    @classmethod
+    def field_paths(cls):
+        """returns the dotted attribute names of every non-PropertySet field,
+        including the fields of nested PropertySets"""
+        paths = []
+        for attr in cls.field_names:
+            subset = type(getattr(cls, attr))
+            if issubclass(subset, PropertySet):
+                paths.extend(attr + '.' + path for path in subset.field_paths())
+            else:
+                paths.append(attr)
+        return paths
+
+    @classmethod
+    def projection(cls, fields):
+        """converts a list of attribute names into the {property name:
+        projection} dict taken by Parser's 'fields' argument. Fields of nested
+        PropertySets are given as dotted names, e.g. 'appearance.gender'"""
+        result = {}
+        for field in fields:
+            attr, _, rest = field.partition('.')
+            if attr not in cls.field_names:
+                raise KeyError("Unknown field for {}: {}".format(cls.__name__, field))
+            name = cls.field_names[attr]
+
+            if not rest or (name in result and result[name] is None):
+                result[name] = None
+                continue
+
+            subset = type(getattr(cls, attr))
+            if not issubclass(subset, PropertySet):
+                raise KeyError("Field {} of {} has no sub-fields".format(attr, cls.__name__))
+            sub = subset.projection([rest])
+            result[name] = dict(result.get(name) or {}, **sub)
+        return result
+
+    def to_dict(self):
+        """returns this set's fields as a plain dict of attribute names to
+        values, nested PropertySets become nested dicts"""
+        result = OrderedDict()
+        for name in self.field_names:
+            value = getattr(self, name)
+            if isinstance(value, PropertySet):
+                value = value.to_dict()
+            result[name] = value
+        return result
@@ -0,0 +1,73 @@
+from collections import deque, namedtuple
+from concurrent.futures import (Executor, ProcessPoolExecutor, ThreadPoolExecutor,
+                                FIRST_COMPLETED, wait)
+import os
+
+from .pool import CharacterPool
+
+ScanResult = namedtuple('ScanResult', ('path', 'characters', 'error'))
+ScanResult.__doc__ = """Result of scanning one file. 'characters' is a list of
+Character.to_dict() dicts, if the file couldn't be parsed it is None and
+'error' holds the exception"""
+
+def make_executor(executor, workers=None):
+    """returns a new Executor for executor='process' or 'thread'"""
+    if executor == 'process':
+        return ProcessPoolExecutor(max_workers=workers)
+    if executor == 'thread':
+        return ThreadPoolExecutor(max_workers=workers)
+    raise ValueError("Unknown executor type: {}".format(executor))
+
+def scan_file(path):
+    """parse a single file into a ScanResult, this is what scan() runs on each
+    worker"""
+    try:
+        chars = [char.to_dict() for char in CharacterPool(path).characters()]
+    except Exception as e:
+        return ScanResult(path, None, e)
+    return ScanResult(path, chars, None)
+
+def scan(paths, workers=None, executor='process', ordered=False):
+    """parse many files in parallel, yielding a ScanResult for each one.
+
+    'executor' is 'process' or 'thread' or an existing Executor to use, in
+    which case it is left running afterwards. Results come back as soon as
+    each file is done unless 'ordered' is set, in which case they come back
+    in the same order as 'paths'. Only a few files per worker are in flight at
+    a time so 'paths' can be an arbitrarily long iterator.
+
+    Errors parsing a file are returned in its ScanResult rather than raised,
+    so one bad file doesn't stop the rest of the batch"""
+    count = workers or os.cpu_count() or 1
+    if isinstance(executor, Executor):
+        yield from _scan(executor, paths, count, ordered)
+        return
+
+    with make_executor(executor, workers) as pool:
+        yield from _scan(pool, paths, count, ordered)
+
+def _scan(pool, paths, workers, ordered):
+    #enough files queued up that workers always have the next one ready
+    window = 2 * workers
+
+    if ordered:
+        queue = deque()
+        for path in paths:
+            queue.append(pool.submit(scan_file, path))
+            if len(queue) >= window:
+                yield queue.popleft().result()
+        while queue:
+            yield queue.popleft().result()
+        return
+
+    pending = set()
+    for path in paths:
+        pending.add(pool.submit(scan_file, path))
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
@@ -0,0 +1,186 @@
+"""Columnar snapshots of decoded pools.
+
+A snapshot file is laid out as:
+
+    magic        8 bytes  b'XCFPSNP1'
+    directory    2 x u64  offset and length of the JSON directory
+    columns      8 byte aligned blocks of little endian column data
+    directory    JSON describing the rows and each column's blocks
+
+Int columns are int32 arrays, Bool columns one byte per row, Name columns int32
+codes into a list of categories kept in the directory and Str columns an
+int64 array of row offsets into a latin-1 blob. Opening a snapshot memory maps
+it, so columns are only paged in as they are used"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from .character import Character
+from .columns import read_columns
+from .properties.atomic import StrProperty
+from .table import CharacterTable
+
+MAGIC = b'XCFPSNP1'
+HEADER = struct.Struct('<8sQQ')
+VERSION = 1
+
+class SnapshotError(Exception):
+    pass
+
+class DictColumn():
+    """A dictionary encoded column of a Snapshot"""
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return self.categories[self.codes[index]]
+
+class BlobColumn():
+    """A string column of a Snapshot stored as offsets into a blob"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        start = self.offsets[index]
+        end = self.offsets[index + 1]
+        return str(self.blob[start:end], 'latin_1')
+
+def export_snapshot(pool, fname, fields=None):
+    """write 'fields' (default all of them) of every character in 'pool' to
+    snapshot file 'fname'"""
+    if fields is None:
+        fields = Character.field_paths()
+
+    builders = read_columns(pool, fields, blob_types=StrProperty)
+
+    columns = []
+    #written to a temporary file that replaces 'fname' once it's complete,
+    #so a write that's interrupted doesn't leave a broken snapshot behind
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(fname)))
+    try:
+        with open(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 0, 0))
+
+            def write_block(data):
+                #keep every block aligned so it can be cast in place on load
+                f.write(bytes(-f.tell() % 8))
+                offset = f.tell()
+                if sys.byteorder != 'little' and isinstance(data, array):
+                    data = array(data.typecode, data)
+                    data.byteswap()
+                f.write(data)
+                return [offset, len(data) * getattr(data, 'itemsize', 1)]
+
+            for path, builder in zip(fields, builders):
+                column = {'path': path, 'kind': builder.kind}
+                column['data'] = write_block(builder.values)
+                if builder.kind == 'dict':
+                    column['categories'] = builder.categories
+                elif builder.kind == 'blob':
+                    column['blob'] = write_block(builder.blob)
+                columns.append(column)
+
+            if builders:
+                rows = len(builders[0])
+            else:
+                with pool.parser() as parser:
+                    rows = parser.read_header()
+
+            directory = json.dumps({
+                'version': VERSION,
+                'rows': rows,
+                'columns': columns,
+            }).encode('utf-8')
+            offset = f.tell()
+            f.write(directory)
+
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, offset, len(directory)))
+        os.replace(tmp_path, fname)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+class Snapshot(CharacterTable):
+    """A read only CharacterTable backed by a memory mapped snapshot file"""
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.cls = Character
+
+        with open(fname, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, offset, length = HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            raise SnapshotError("Not a snapshot file: {}".format(fname))
+        directory = json.loads(str(self._view[offset:offset + length], 'utf-8'))
+        if directory.get('version') != VERSION:
+            raise SnapshotError("Unsupported snapshot version: {}".format(directory.get('version')))
+
+        self._length = directory['rows']
+        self.columns = {}
+        for column in directory['columns']:
+            kind = column['kind']
+            if kind == 'bool':
+                values = self._block(column['data'], 'B')
+            elif kind == 'blob':
+                values = BlobColumn(self._block(column['data'], 'q'), self._block(column['blob'], 'B'))
+            else:
+                values = self._block(column['data'], 'i')
+                if kind == 'dict':
+                    values = DictColumn(values, column['categories'])
+            self.columns[column['path']] = values
+
+    def _block(self, block, typecode):
+        offset, length = block
+        view = self._view[offset:offset + length]
+        if sys.byteorder == 'little':
+            return view.cast(typecode)
+
+        #the file is little endian so big endian hosts need a swapped copy
+        data = array(typecode)
+        data.frombytes(view)
+        data.byteswap()
+        return data
+
+    def append(self, char):
+        raise TypeError("Snapshots are read only")
+
+    def close(self):
+        """release the file mapping, it stays open until any views of it
+        that are still in use have gone"""
+        self.columns = {}
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def open_snapshot(fname):
+    """open a snapshot written by CharacterPool.export_snapshot()"""
+    return Snapshot(fname)
@@ -0,0 +1,156 @@
+"""Opt-in statistics on where parsing time goes.
+
+A ParseStats attached to a parser (or given to a CharacterPool as 'stats')
+counts and times every property frame it reads, every value it decodes by
+type, every read on the underlying file and every character. Parsers without
+one run exactly the same code as before, attaching replaces the instrumented
+methods on that parser instance only.
+
+To feed the numbers somewhere else subclass ParseStats and override the on_*
+hooks, calling the base versions to keep the totals too"""
+
+from time import perf_counter
+
+class TypeStats():
+    """totals for the values of one property type"""
+
+    __slots__ = ('count', 'bytes', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {'count': self.count, 'bytes': self.bytes, 'seconds': self.seconds}
+
+class ParseStats():
+    """Collects parse statistics:
+
+    types: a dict of typename (the struct name for structs) to TypeStats for
+    the values decoded. Struct values are decoded lazily so their fields are
+    counted under their own types if and when they're accessed.
+
+    frames, frame_seconds: property frames read (including the 'None' ending
+    each block and those of properties that are skipped) and the time spent
+    reading them and looking up their types.
+
+    reads, bytes_read, read_seconds: reads on the underlying file object.
+    Memory mapped files and buffers aren't read this way so don't count.
+
+    characters, character_seconds, slowest_character: characters decoded and
+    how long they took in all and at most.
+
+    Compiled decoders read straight from the buffer so only character timings
+    are collected for them. A ParseStats isn't thread safe, and isn't passed
+    on to workers by parallel decoding, update() can add up separate ones"""
+
+    def __init__(self):
+        self.types = {}
+        self.frames = 0
+        self.frame_seconds = 0.0
+        self.reads = 0
+        self.bytes_read = 0
+        self.read_seconds = 0.0
+        self.characters = 0
+        self.character_seconds = 0.0
+        self.slowest_character = 0.0
+
+    def on_frame(self, typename, size, seconds):
+        """called after each property frame is read, 'typename' is 'None' at
+        the end of a block"""
+        self.frames += 1
+        self.frame_seconds += seconds
+
+    def on_value(self, typename, size, seconds):
+        """called after each property value of 'size' bytes is decoded"""
+        stats = self.types.get(typename)
+        if stats is None:
+            stats = self.types[typename] = TypeStats()
+        stats.count += 1
+        stats.bytes += size
+        stats.seconds += seconds
+
+    def on_read(self, size, seconds):
+        """called after each read of the underlying file"""
+        self.reads += 1
+        self.bytes_read += size
+        self.read_seconds += seconds
+
+    def on_character(self, seconds):
+        """called after each character is decoded"""
+        self.characters += 1
+        self.character_seconds += seconds
+        if seconds > self.slowest_character:
+            self.slowest_character = seconds
+
+    def update(self, other):
+        """add the totals from another ParseStats to these, such as one
+        collected on a worker"""
+        for name, stats in other.types.items():
+            mine = self.types.get(name)
+            if mine is None:
+                mine = self.types[name] = TypeStats()
+            mine.count += stats.count
+            mine.bytes += stats.bytes
+            mine.seconds += stats.seconds
+        self.frames += other.frames
+        self.frame_seconds += other.frame_seconds
+        self.reads += other.reads
+        self.bytes_read += other.bytes_read
+        self.read_seconds += other.read_seconds
+        self.characters += other.characters
+        self.character_seconds += other.character_seconds
+        self.slowest_character = max(self.slowest_character, other.slowest_character)
+
+    def attach(self, parser):
+        """instrument 'parser' to report to these stats"""
+        cls = type(parser)
+        parser.stats = self
+
+        def read_frame():
+            start = perf_counter()
+            frame = cls.read_frame(parser)
+            seconds = perf_counter() - start
+            if frame is None:
+                self.on_frame('None', 0, seconds)
+            else:
+                self.on_frame(frame[1].typename, frame[2], seconds)
+            return frame
+
+        def unpack(proptype, data, fields=None):
+            start = perf_counter()
+            value = cls.unpack(parser, proptype, data, fields)
+            self.on_value(proptype.typename, len(data), perf_counter() - start)
+            return value
+
+        parser.read_frame = read_frame
+        parser.unpack = unpack
+
+    def to_dict(self):
+        return {
+            'types': {name: stats.to_dict() for name, stats in self.types.items()},
+            'frames': self.frames,
+            'frame_seconds': self.frame_seconds,
+            'reads': self.reads,
+            'bytes_read': self.bytes_read,
+            'read_seconds': self.read_seconds,
+            'characters': self.characters,
+            'character_seconds': self.character_seconds,
+            'slowest_character': self.slowest_character,
+        }
+
+    def format(self):
+        """returns the statistics as a printable table"""
+        lines = ['{:<24} {:>10} {:>12} {:>12}'.format('type', 'count', 'bytes', 'decode ms')]
+        for name, stats in sorted(self.types.items(), key=lambda item: -item[1].seconds):
+            lines.append('{:<24} {:>10} {:>12} {:>12.3f}'.format(
+                name, stats.count, stats.bytes, stats.seconds * 1000))
+        lines.append('framing: {} frames, {:.3f} ms'.format(self.frames, self.frame_seconds * 1000))
+        lines.append('reads: {} calls, {} bytes, {:.3f} ms'.format(
+            self.reads, self.bytes_read, self.read_seconds * 1000))
+        mean = self.character_seconds / self.characters if self.characters else 0.0
+        lines.append('characters: {}, {:.3f} ms, mean {:.3f} ms, slowest {:.3f} ms'.format(
+            self.characters, self.character_seconds * 1000, mean * 1000,
+            self.slowest_character * 1000))
+        return '\n'.join(lines)
@@ -0,0 +1,138 @@
+"""Deterministic synthetic character pools for tests and benchmarks.
+
+generate_pool() writes a valid pool of any size laid out like the ones the
+game writes, with full TAppearance structs, biographies of varied length and
+a configurable number of distinct names. The same arguments always give the
+same file"""
+
+import random
+
+from .character import Character
+from .properties import Property
+from .properties.struct import AppearanceStruct
+from .writer import PoolWriter
+
+SYLLABLES = ('an', 'bel', 'cor', 'da', 'el', 'fin', 'gar', 'ha', 'is', 'jo',
+             'ka', 'lin', 'mar', 'no', 'or', 'pe', 'quin', 'ra', 'sol', 'ta',
+             'ul', 'vin', 'wen', 'xa', 'yor', 'zu')
+
+WORDS = ('the', 'a', 'soldier', 'served', 'with', 'distinction', 'in', 'before',
+         'joining', 'XCOM', 'resistance', 'after', 'invasion', 'survived', 'and',
+         'was', 'known', 'for', 'an', 'unusual', 'talent', 'under', 'fire',
+         'rarely', 'spoke', 'about', 'family', 'lost', 'during', 'war')
+
+CLASSES = ('Rookie', 'Ranger', 'Sharpshooter', 'Grenadier', 'Specialist',
+           'PsiOperative', 'Reaper', 'Skirmisher', 'Templar')
+
+COUNTRIES = ('Country_UK', 'Country_USA', 'Country_Mexico', 'Country_France',
+             'Country_Germany', 'Country_Japan', 'Country_Brazil', 'Country_Nigeria',
+             'Country_India', 'Country_Russia', 'Country_Australia', 'Country_Canada')
+
+MONTHS = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December')
+
+# TAppearance properties in the order the game writes them, with the values
+# to pick from. Ints are given as a range
+APPEARANCE = (
+    ('nmHead', 'NameProperty', ('CaucMale_F', 'CaucFem_A', 'LatFem_C', 'AfrMale_B', 'AsnFem_D')),
+    ('iGender', 'IntProperty', range(1, 3)),
+    ('iRace', 'IntProperty', range(0, 4)),
+    ('nmHaircut', 'NameProperty', ('MaleHairShort_A', 'Female_LongWavy', 'Bald', 'Female_Bun')),
+    ('iHairColor', 'IntProperty', range(0, 24)),
+    ('iFacialHair', 'IntProperty', range(0, 2)),
+    ('nmBeard', 'NameProperty', ('None', 'Beard_Beaglerush', 'Beard_Stubble')),
+    ('iSkinColor', 'IntProperty', range(0, 12)),
+    ('iEyeColor', 'IntProperty', range(0, 20)),
+    ('nmFlag', 'NameProperty', COUNTRIES),
+    ('iVoice', 'IntProperty', range(0, 16)),
+    ('iAttitude', 'IntProperty', range(0, 6)),
+    ('iArmorDeco', 'IntProperty', range(-1, 8)),
+    ('iArmorTint', 'IntProperty', range(0, 64)),
+    ('iArmorTintSecondary', 'IntProperty', range(0, 64)),
+    ('iWeaponTint', 'IntProperty', range(-1, 64)),
+    ('iTattooTint', 'IntProperty', range(-1, 64)),
+    ('nmWeaponPattern', 'NameProperty', ('Pat_Nothing', 'Pat_Camo', 'Pat_Stripes')),
+    ('nmPawn', 'NameProperty', ('None',)),
+    ('nmTorso', 'NameProperty', ('CnvMed_Std_D_M', 'CnvMed_Std_C_F', 'CnvMed_Std_A_M')),
+    ('nmArms', 'NameProperty', ('CnvMed_Std_A_M', 'CnvMed_Std_F_F', 'CnvMed_Std_B_M')),
+    ('nmLegs', 'NameProperty', ('CnvMed_Std_B_M', 'CnvMed_Std_C_F', 'CnvMed_Std_A_M')),
+    ('nmHelmet', 'NameProperty', ('Helmet_0_NoHelmet_M', 'Helmet_0_NoHelmet_F',
+                                  'DLC_0_Hat_A_FloppyBoonie_M')),
+    ('nmEye', 'NameProperty', ('DefaultEyes',)),
+    ('nmTeeth', 'NameProperty', ('DefaultTeeth',)),
+    ('nmFacePropLower', 'NameProperty', ('Prop_FaceLower_Blank', 'Prop_FaceLower_Cigar')),
+    ('nmFacePropUpper', 'NameProperty', ('Prop_FaceUpper_Blank', 'Prop_FaceUpper_Glasses')),
+    ('nmPatterns', 'NameProperty', ('Pat_Nothing', 'Pat_Camo')),
+    ('nmVoice', 'NameProperty', ('MaleVoice1_English_US', 'MaleVoice2_English_UK',
+                                 'FemaleVoice1_English_US', 'FemaleVoice2_English_UK')),
+    ('nmLanguage', 'NameProperty', ('None',)),
+    ('nmTattoo_LeftArm', 'NameProperty', ('Tattoo_Arms_BLANK', 'Tattoo_Arms_01')),
+    ('nmTattoo_RightArm', 'NameProperty', ('Tattoo_Arms_BLANK', 'Tattoo_Arms_02')),
+    ('nmScars', 'NameProperty', ('None', 'Scars_BLANK', 'Scars_01')),
+    ('nmTorso_Underlay', 'NameProperty', ('CnvUnderlay_std_A_F', 'CnvUnderlay_std_A_M')),
+    ('nmArms_Underlay', 'NameProperty', ('CnvMed_Underlay_A_F', 'CnvMed_Underlay_A_M')),
+    ('nmLegs_Underlay', 'NameProperty', ('CnvUnderlay_std_A_F', 'CnvUnderlay_std_A_M')),
+    ('nmFacePaint', 'NameProperty', ('None', 'FacePaint_01')),
+)
+
+def make_names(rng, count):
+    """returns 'count' distinct made up names"""
+    names = set()
+    while len(names) < count:
+        length = rng.randint(2, 4)
+        names.add(''.join(rng.choice(SYLLABLES) for _ in range(length)).capitalize())
+    return sorted(names)
+
+def make_biography(rng, max_length):
+    words = []
+    length = 0
+    target = rng.randint(0, max_length)
+    while length < target:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:max_length]
+
+def make_appearance(rng):
+    appearance = AppearanceStruct('kAppearance', 'TAppearance')
+    for name, typename, choices in APPEARANCE:
+        appearance.add_property(Property(name, typename, rng.choice(choices)))
+    return appearance
+
+def make_character(rng, first_names, last_names, max_biography=2000):
+    """returns a random Character using names from the given lists"""
+    char = Character()
+    char.firstName = rng.choice(first_names)
+    char.lastName = rng.choice(last_names)
+    char.nickName = "'{}'".format(rng.choice(first_names)) if rng.random() < 0.3 else ''
+    char.soldierClass = rng.choice(CLASSES)
+    char.characterTemplate = 'Soldier'
+    char.add_property(make_appearance(rng))
+    char.country = rng.choice(COUNTRIES)
+    char.allowedTypeSoldier = rng.random() < 0.9
+    char.allowedTypeVIP = rng.random() < 0.3
+    char.allowedTypeDarkVIP = rng.random() < 0.3
+    char.timestamp = '{} {}, {} - {}:{:02} {}'.format(
+        rng.choice(MONTHS), rng.randint(1, 28), rng.randint(2016, 2024),
+        rng.randint(1, 12), rng.randint(0, 59), rng.choice(('AM', 'PM')))
+    char.biography = make_biography(rng, max_biography)
+    return char
+
+def characters(count, seed=0, names=200, max_biography=2000):
+    """yields 'count' random Characters, with first and last names each drawn
+    from 'names' distinct values and biographies of up to 'max_biography'
+    characters"""
+    rng = random.Random(seed)
+    first_names = make_names(rng, names)
+    last_names = make_names(rng, names)
+    for _ in range(count):
+        yield make_character(rng, first_names, last_names, max_biography)
+
+def generate_pool(fname, count, seed=0, names=200, max_biography=2000):
+    """write a pool of 'count' random characters to 'fname' (a file name, '-'
+    or an open binary file), see characters(). Characters are written as they
+    are made so any size of pool can be generated"""
+    with PoolWriter(fname) as writer:
+        writer.write_header(count)
+        for char in characters(count, seed, names, max_biography):
+            writer.write_record(char)
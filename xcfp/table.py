@@ -0,0 +1,145 @@
+from array import array
+from collections import OrderedDict
+from operator import attrgetter
+
+from .character import Character
+from .properties.atomic import IntProperty, BoolProperty
+from .property_set import PropertySet
+
+def field_property(cls, path):
+    """returns the Property descriptor for a dotted field path of a
+    PropertySet class, e.g. field_property(Character, 'appearance.gender')"""
+    desc = None
+    for attr in path.split('.'):
+        if desc is not None:
+            cls = type(desc)
+        if not (isinstance(cls, type) and issubclass(cls, PropertySet)) or attr not in cls.field_names:
+            raise KeyError("Unknown field: {}".format(path))
+        desc = getattr(cls, attr)
+    return desc
+
+class CharacterTable():
+    """Characters stored column-wise rather than as a Character object graph
+    each. There is one column per field, keyed by dotted attribute name as in
+    PropertySet.field_paths(), Int and Bool fields are held in arrays and
+    other values in lists, with repeated strings sharing a single copy.
+
+    Indexing gives RowViews, which read their values out of the columns but
+    otherwise act like the Character they came from. Fields that weren't
+    stored read as the Property defaults"""
+
+    def __init__(self, fields=None, cls=Character):
+        if fields is None:
+            fields = cls.field_paths()
+
+        self.cls = cls
+        self.columns = OrderedDict()
+        self._getters = []
+        self._strings = {}
+        for path in fields:
+            desc = field_property(cls, path)
+            if isinstance(desc, PropertySet):
+                raise KeyError("Can't store a whole PropertySet as a column: {}".format(path))
+            if isinstance(desc, IntProperty):
+                column = array('i')
+            elif isinstance(desc, BoolProperty):
+                column = array('b')
+            else:
+                column = []
+            self.columns[path] = column
+            self._getters.append((column, attrgetter(path)))
+        self._length = 0
+
+    @classmethod
+    def from_characters(cls, characters, fields=None):
+        """build a table from an iterable of Characters"""
+        table = cls(fields)
+        table.extend(characters)
+        return table
+
+    def append(self, char):
+        strings = self._strings
+        for column, getter in self._getters:
+            value = getter(char)
+            if isinstance(value, str):
+                value = strings.setdefault(value, value)
+            column.append(value)
+        self._length += 1
+
+    def extend(self, characters):
+        for char in characters:
+            self.append(char)
+
+    def column(self, path):
+        return self.columns[path]
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield RowView(self, i)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [RowView(self, i) for i in range(*key.indices(self._length))]
+
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("CharacterTable index out of range")
+        return RowView(self, key)
+
+class RowView():
+    """A lightweight view of one row of a CharacterTable (or of a nested
+    PropertySet within it) that exposes the same attributes as the
+    PropertySet class it was built from"""
+
+    __slots__ = ('_table', '_index', '_cls', '_prefix')
+
+    def __init__(self, table, index, cls=None, prefix=''):
+        self._table = table
+        self._index = index
+        self._cls = table.cls if cls is None else cls
+        self._prefix = prefix
+
+    @property
+    def field_names(self):
+        return self._cls.field_names
+
+    def __getattr__(self, attr):
+        cls = self._cls
+        if attr not in cls.field_names:
+            raise AttributeError("'{}' has no field '{}'".format(cls.__name__, attr))
+
+        desc = getattr(cls, attr)
+        path = self._prefix + attr
+        if isinstance(desc, PropertySet):
+            return RowView(self._table, self._index, type(desc), path + '.')
+
+        column = self._table.columns.get(path)
+        if column is None:
+            return desc._get()
+
+        value = column[self._index]
+        if isinstance(desc, BoolProperty):
+            return bool(value)
+        return value
+
+    def to_dict(self):
+        """returns the row as nested dicts like PropertySet.to_dict()"""
+        result = OrderedDict()
+        for attr in self._cls.field_names:
+            value = getattr(self, attr)
+            if isinstance(value, RowView):
+                value = value.to_dict()
+            result[attr] = value
+        return result
+
+    def details(self):
+        return self._cls.details(self)
+
+    def __str__(self):
+        if self._prefix:
+            return "<struct: {}>".format(self._cls.typename)
+        return self._cls.__str__(self)
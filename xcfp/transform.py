@@ -0,0 +1,36 @@
+from .parser import XCFParseError
+from .pool import CharacterPool
+from .writer import PoolWriter
+
+def transform(src, dst, fn, pool_name=None):
+    """stream the characters of pool 'src' to a new pool 'dst', calling
+    fn(Character) on each one to change it in place on the way. Either can be
+    '-' for stdin/stdout, 'src' can also be a CharacterPool. Returns the number
+    of characters written.
+
+    Several pools one after the other in 'src', such as from cat, are merged
+    into one. The total isn't known until the end so that needs a seekable
+    'dst' to fill the header in afterwards, otherwise anything after the first
+    pool is an error.
+
+    Only one character is held at a time, and values aren't interned across
+    characters unless 'src' is a CharacterPool set up to. Each character is
+    written back out with just the properties 'fn' changed encoded again, see
+    PropertySet.to_bytes()"""
+    pool = src if isinstance(src, CharacterPool) else CharacterPool(src, intern=False)
+
+    with pool.parser() as parser, PoolWriter(dst, pool_name) as writer:
+        count = parser.read_header()
+        merge = writer.file.seekable()
+        writer.write_header(None if merge else count)
+        while True:
+            for _ in range(count):
+                char = pool.read_record(parser)
+                fn(char)
+                writer.write_record(char)
+            if parser.at_end():
+                return writer.written
+            if not merge:
+                raise XCFParseError("Data after the end of the pool, writing more than "
+                                    "one pool needs a seekable destination")
+            count = parser.read_pool_header()
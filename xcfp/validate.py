@@ -0,0 +1,286 @@
+"""Checking a pool's structure without decoding it.
+
+validate() walks the property framing of a whole pool (names, type names,
+sizes and padding, into nested structs too) straight out of the file's bytes,
+jumping over every value. It checks everything read_header() does, that
+every property has a known type and that each size fits inside its block,
+and reports problems with their byte offsets rather than raising on the
+first one. Strict validation also has each type check its values' layout
+(see Property.check_value) and rejects trailing data after the last record"""
+
+import mmap
+from collections import namedtuple
+
+from .parser import BufferParser
+from .properties import PropertyType, INT, SIZE
+
+Problem = namedtuple('Problem', ('offset', 'record', 'message'))
+Problem.__doc__ = """A problem found at byte 'offset' of a pool, 'record' is
+the index of the character it's in or None for the header"""
+
+class ValidationReport():
+    """The result of validating a pool. 'count' is the number of characters
+    the header declares (None if the header couldn't be read), 'records' how
+    many of them were walked and 'problems' a list of Problems, in file
+    order"""
+
+    def __init__(self, fname, size):
+        self.fname = fname
+        self.size = size
+        self.count = None
+        self.records = 0
+        self.problems = []
+
+    @property
+    def valid(self):
+        return not self.problems
+
+    def __bool__(self):
+        return self.valid
+
+    def to_dict(self):
+        return {
+            'file': self.fname,
+            'size': self.size,
+            'count': self.count,
+            'records': self.records,
+            'valid': self.valid,
+            'problems': [problem._asdict() for problem in self.problems],
+        }
+
+    def __str__(self):
+        #pools of a buffer or an open file don't have a name
+        label = '<buffer>' if self.fname is None else self.fname
+        if self.valid:
+            return "{}: OK, {} characters".format(label, self.records)
+        return '\n'.join("{}:{}: {}".format(label, problem.offset, problem.message)
+                         for problem in self.problems)
+
+class Invalid(Exception):
+    """a problem that stops the framing being followed any further"""
+
+    def __init__(self, offset, message):
+        super().__init__(offset, message)
+        self.offset = offset
+        self.message = message
+
+#what the framing of a property says to do with its value
+STRUCT = 'struct'
+HOOK = 'hook'
+
+#the rest of the framing of a 'None' after its length
+NONE_TAIL = b'None' + bytes(5)
+
+class Validator():
+    """Walks the framing of the pool in 'buffer', bytes or an mmap"""
+
+    def __init__(self, buffer, strict=False, types=None):
+        self.buffer = buffer
+        self.strict = strict
+        self.types = PropertyType.registry() if types is None else types
+        #(name, typename, proptype, kind) by the bytes of their framing
+        self._heads = {}
+        self._hook_parser = None
+        self.record = None
+        self.problems = []
+
+    def problem(self, offset, message):
+        self.problems.append(Problem(offset, self.record, message))
+
+    def read_str(self, pos, end):
+        """returns (encoded string without its null, position after it)"""
+        buf = self.buffer
+        if pos + 4 > end:
+            raise Invalid(pos, "Truncated string")
+        size, = INT.unpack_from(buf, pos)
+        if size == 0:
+            return (b'', pos + 4)
+        start = pos + 4
+        stop = start + size
+        if size < 0 or stop > end:
+            raise Invalid(pos, "String length {} runs past the end of its block".format(size))
+        if buf[stop - 1] != 0:
+            raise Invalid(pos, "Incorrect String size: {}".format(size))
+        return (bytes(buf[start:stop - 1]), stop)
+
+    def skip_padding(self, pos, end):
+        if pos + 4 > end:
+            raise Invalid(pos, "Truncated padding")
+        pad, = INT.unpack_from(self.buffer, pos)
+        if pad != 0:
+            raise Invalid(pos, "Expected null padding DWORD, got {}".format(pad))
+        return pos + 4
+
+    def property_type(self, typename):
+        """returns the Property class for encoded 'typename', None if it's
+        unknown"""
+        return self.types.get(typename.decode('latin_1'))
+
+    def read_head(self, pos, end):
+        """check the name and type framing at 'pos' the slow way, returns
+        (name, typename, proptype, position of the size). 'typename' is None
+        for the 'None' ending a block"""
+        name, pos = self.read_str(pos, end)
+        pos = self.skip_padding(pos, end)
+        if name == b'None':
+            return (name, None, None, pos)
+        typename, pos = self.read_str(pos, end)
+        pos = self.skip_padding(pos, end)
+        return (name, typename, self.property_type(typename), pos)
+
+    def walk_block(self, pos, end, frames=None):
+        """walk the property block at 'pos', which must end by 'end', and
+        return the position after its 'None'. If 'frames' is a list the (name,
+        typename, value offset, size) of each property is added to it"""
+        data = self.buffer
+        heads = self._heads
+        unpack_int = INT.unpack_from
+        while True:
+            start = pos
+
+            #the name and type framing repeats from record to record, so each
+            #distinct run of those bytes is only checked the first time and
+            #looked up after that
+            head = None
+            if pos + 4 <= end:
+                name_size, = unpack_int(data, pos)
+                if name_size == 5 and data[pos + 4:pos + 13] == NONE_TAIL:
+                    return pos + 13
+                type_pos = pos + name_size + 8
+                if name_size > 0 and type_pos + 4 <= end:
+                    type_size, = unpack_int(data, type_pos)
+                    size_pos = type_pos + type_size + 8
+                    if type_size > 0 and size_pos <= end:
+                        head = heads.get(data[pos:size_pos])
+
+            if head is None:
+                name, typename, proptype, size_pos = self.read_head(pos, end)
+                if typename is None:
+                    return size_pos
+                kind = None
+                if proptype is not None:
+                    if hasattr(proptype, 'resolve_type'):
+                        kind = STRUCT
+                    elif hasattr(proptype, 'data_read_hook'):
+                        kind = HOOK
+                head = heads[bytes(data[pos:size_pos])] = (name, typename, proptype, kind)
+
+            name, typename, proptype, kind = head
+            if proptype is None:
+                self.problem(start, "Unknown PropertyType: {}".format(typename.decode('latin_1')))
+
+            pos = size_pos
+            if pos + 8 > end:
+                raise Invalid(pos, "Truncated property size")
+            size, pad = SIZE.unpack_from(data, pos)
+            if pad != 0:
+                raise Invalid(pos + 4, "Expected null padding DWORD, got {}".format(pad))
+            if size < 0:
+                raise Invalid(pos, "Negative property size: {}".format(size))
+            pos += 8
+
+            if kind is STRUCT:
+                pos = self.walk_struct(pos, end, size)
+                continue
+            if kind is HOOK:
+                parser = self.hook_parser()
+                parser.pos = pos
+                size = proptype.data_read_hook(parser, size)
+                pos = parser.pos
+
+            stop = pos + size
+            if stop > end:
+                raise Invalid(start, "Value of {} bytes runs past the end of its block".format(size))
+            if self.strict and proptype is not None:
+                message = proptype.check_value(data[pos:stop])
+                if message is not None:
+                    self.problem(start, message)
+            if frames is not None:
+                frames.append((name, typename, pos, size))
+            pos = stop
+
+    def hook_parser(self):
+        """a parser over the whole buffer for data_read_hooks to read from"""
+        if self._hook_parser is None:
+            self._hook_parser = BufferParser(self.buffer)
+        return self._hook_parser
+
+    def walk_struct(self, pos, end, size):
+        """walk a struct's name and payload at 'pos', returns the position
+        after it"""
+        start = pos
+        struct_name, pos = self.read_str(pos, end)
+        pos = self.skip_padding(pos, end)
+        if self.property_type(struct_name) is None:
+            self.problem(start, "Unknown PropertyType: {}".format(struct_name.decode('latin_1')))
+
+        stop = pos + size
+        if stop > end:
+            raise Invalid(pos, "Struct of {} bytes runs past the end of its block".format(size))
+        #the size tells us where the struct ends, so problems inside it don't
+        #stop the rest of the record being checked
+        try:
+            payload_end = self.walk_block(pos, stop)
+        except Invalid as e:
+            self.problem(e.offset, e.message)
+        else:
+            if payload_end != stop:
+                self.problem(payload_end, "Struct properties end {} bytes before its size".format(stop - payload_end))
+        return stop
+
+    def read_header(self, report):
+        """check the header, returns the position of the first record"""
+        buf = self.buffer
+        end = len(buf)
+        if end < 4:
+            raise Invalid(0, "Truncated header")
+        magic, = INT.unpack_from(buf, 0)
+        if magic != -1:
+            raise Invalid(0, "Incorrect Magic Number: {}".format(magic))
+
+        frames = []
+        pos = self.walk_block(4, end, frames)
+        names = [(name, typename) for name, typename, _, _ in frames]
+        pool_name = (b'PoolFileName', b'StrProperty')
+        if names == [pool_name]:
+            count = 0
+        elif names == [(b'CharacterPool', b'ArrayProperty'), pool_name] and frames[0][3] == 4:
+            count, = INT.unpack_from(buf, frames[0][2])
+        else:
+            raise Invalid(4, "Expected CharacterPool:ArrayProperty and PoolFileName:StrProperty header, got {}"
+                          .format(', '.join('{}:{}'.format(name.decode('latin_1'), typename.decode('latin_1'))
+                                            for name, typename in names)))
+
+        if pos + 4 > end:
+            raise Invalid(pos, "Truncated character count")
+        _count, = INT.unpack_from(buf, pos)
+        if count != _count:
+            raise Invalid(pos, "Mismatched character counts: {} != {}".format(count, _count))
+        report.count = count
+        return pos + 4
+
+    def validate(self, report):
+        """fill in 'report' for the whole pool"""
+        end = len(self.buffer)
+        try:
+            pos = self.read_header(report)
+            for record in range(report.count):
+                self.record = record
+                pos = self.walk_block(pos, end)
+                report.records += 1
+            self.record = None
+            if self.strict and pos != end:
+                self.problem(pos, "{} bytes of trailing data".format(end - pos))
+        except Invalid as e:
+            self.problem(e.offset, e.message)
+        report.problems = self.problems
+        return report
+
+def validate(source, strict=False, fname=None):
+    """validate the pool in 'source', a bytes-like object or mmap, returning
+    a ValidationReport. 'fname' is the name to give it in the report"""
+    #framing is looked up by slices of the buffer, which need to be hashable
+    if not isinstance(source, (bytes, mmap.mmap)):
+        source = bytes(source)
+    report = ValidationReport(fname, len(source))
+    return Validator(source, strict).validate(report)
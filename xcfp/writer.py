@@ -0,0 +1,137 @@
+import ntpath
+import os
+
+from .properties import Property, INT, END
+
+# where the game expects pools to live, PoolFileName holds this plus the
+# file's name
+POOL_DIR = 'CharacterPool\\Importable\\'
+
+def pool_file_name(fname):
+    """returns the PoolFileName stored in the header of a pool called 'fname'"""
+    return POOL_DIR + ntpath.basename(fname)
+
+def encode_header(count, pool_name):
+    """returns the header of a pool holding 'count' characters, as checked by
+    Parser.read_header()"""
+    name = Property('PoolFileName', 'StrProperty', pool_name).encode()
+    if count == 0:
+        #empty pools leave out the CharacterPool array
+        return INT.pack(-1) + name + END + INT.pack(0)
+
+    array = Property('CharacterPool', 'ArrayProperty', count).encode()
+    return INT.pack(-1) + array + name + END + INT.pack(count)
+
+def encode_record(record):
+    """returns the bytes of one character record, 'record' can be a Character
+    (or any PropertySet) or an already encoded record"""
+    if isinstance(record, (bytes, bytearray, memoryview)):
+        return record
+    return record.to_bytes()
+
+class PoolWriter():
+    """Writes a character pool file. 'f' can be a file name, '-' for stdout
+    or an open binary file. 'pool_name' is the PoolFileName put in the
+    header, by default made from the file name.
+
+    Use it as a context manager then either write() a whole pool at once or
+    write_header() followed by write_record() for each character. If the
+    number of characters isn't known up front write_header() can be left
+    without a count, which is filled in when the writer is closed. Named files
+    are written to a temporary file that replaces the destination once the
+    writer is closed without an error, so a pool can be saved over the file it
+    was read from"""
+
+    def __init__(self, f, pool_name=None):
+        if isinstance(f, str):
+            self.fname = f
+            self.file = None
+        else:
+            self.fname = None
+            self.file = f
+        if pool_name is None:
+            pool_name = pool_file_name(f if isinstance(f, str) and f != '-' else 'Pool.bin')
+        self.pool_name = pool_name
+        self.count = None
+        self.written = 0
+        self._tmp_path = None
+        self._header_pos = None
+
+    def __enter__(self):
+        if self.fname is None:
+            return self
+
+        if self.fname == '-':
+            from sys import stdout
+            self.file = stdout.buffer
+        else:
+            self._tmp_path = '{}.{}.tmp'.format(self.fname, os.getpid())
+            self.file = open(self._tmp_path, 'wb')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self._header_pos is not None:
+            self._patch_header()
+        complete = self.count is not None and self.written == self.count
+        if self._tmp_path is None:
+            self.file.flush()
+        else:
+            self.file.close()
+            if exc_type is None and complete:
+                os.replace(self._tmp_path, self.fname)
+            else:
+                os.remove(self._tmp_path)
+            self._tmp_path = None
+
+        if exc_type is None and not complete:
+            raise ValueError("Incomplete pool: {} of {} characters written"
+                             .format(self.written, self.count))
+
+    def write_header(self, count=None):
+        """start the pool, 'count' is the number of records that will follow.
+        Without a count the header is rewritten with the number of records
+        actually written on close, which needs a seekable file"""
+        if self.count is not None or self._header_pos is not None:
+            raise ValueError("Pool header already written")
+        if count is not None:
+            self.count = count
+            self.file.write(encode_header(count, self.pool_name))
+            return
+
+        if not self.file.seekable():
+            raise ValueError("Can't leave the count out when writing to a stream")
+        self._header_pos = self.file.tell()
+        #a placeholder of the right size, as long as the count isn't 0
+        self.file.write(encode_header(1, self.pool_name))
+
+    def _patch_header(self):
+        end = self.file.tell()
+        self.file.seek(self._header_pos)
+        self.file.write(encode_header(self.written, self.pool_name))
+        if self.written == 0:
+            #empty pools have a shorter header
+            self.file.truncate()
+        else:
+            self.file.seek(end)
+        self.count = self.written
+        self._header_pos = None
+
+    def write_record(self, record):
+        """write one character record, see encode_record()"""
+        if self.count is None and self._header_pos is None:
+            raise ValueError("write_header() must come before any records")
+        if self.count is not None and self.written >= self.count:
+            raise ValueError("More records than the {} in the header".format(self.count))
+        self.file.write(encode_record(record))
+        self.written += 1
+
+    def write(self, records):
+        """write a whole pool of 'records' (see encode_record()). Everything
+        is encoded first so the file gets a single write of precomputed size,
+        unmodified characters are copied straight from their source"""
+        chunks = [encode_record(record) for record in records]
+        if self.count is not None or self._header_pos is not None:
+            raise ValueError("Pool header already written")
+        self.count = self.written = len(chunks)
+        chunks.insert(0, encode_header(len(chunks), self.pool_name))
+        self.file.write(b''.join(chunks))